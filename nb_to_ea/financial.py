@@ -1,9 +1,11 @@
 """Script to migrate financial transactions from NationBuilder to EveryAction"""
 
 import csv
+import hashlib
 import io
 import re
 import signal
+import sqlite3
 import zipfile
 from pathlib import Path
 
@@ -91,11 +93,34 @@ EA_FIELD_LIMITS = {
 }
 
 
+EXCLUDE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS excludes (
+    nb_id TEXT PRIMARY KEY,
+    cents INTEGER NOT NULL,
+    report_mtime_ns INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS reports (
+    digest TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    transactions INTEGER NOT NULL
+);
+"""
+
+
 @click.command()
 @click.argument("nb_csvs", nargs=-1)
 @click.option("--ea_exclude", help="EveryAction contribution report")
+@click.option(
+    "--exclude_db",
+    help="Index to keep exclusions in across runs (updated from reports)",
+)
+@click.option(
+    "--rebuild_excludes",
+    is_flag=True,
+    help="Clear the --exclude_db index first, so only these reports count",
+)
 @click.option("--ea_csv", help="EveryAction CSV to write")
-def main(nb_csvs, ea_exclude, ea_csv):
+def main(nb_csvs, ea_exclude, exclude_db, rebuild_excludes, ea_csv):
     """Converts NationBuilder CSV(s) to EveryAction CSV(s)"""
 
     signal.signal(signal.SIGINT, signal.SIG_DFL)  # Sane ^C behavior
@@ -119,9 +144,20 @@ def main(nb_csvs, ea_exclude, ea_csv):
         patterns = ["ContributionReport-*.txt", "ContributionReport-*.zip"]
         exc_paths = [p for pat in patterns for p in sorted(Path(".").glob(pat))]
 
-    excludes = {}
+    if rebuild_excludes and not exclude_db:
+        print("💥 --rebuild_excludes without --exclude_db")
+        raise SystemExit(1)
+
+    # Without --exclude_db, only this run's reports count (in memory)
+    excludes = open_exclude_db(Path(exclude_db) if exclude_db else ":memory:")
+    if rebuild_excludes:
+        with excludes:
+            excludes.execute("DELETE FROM excludes")
+            excludes.execute("DELETE FROM reports")
+        print(f"🗑️ Cleared {exclude_db}")
+
     for exc_path in exc_paths:
-        excludes.update(read_excludes(exc_path))
+        import_excludes(excludes, exc_path)
 
     for nb_path in nb_paths:
         if ea_csv:
@@ -134,6 +170,60 @@ def main(nb_csvs, ea_exclude, ea_csv):
         convert_file(nb_path, ea_path, excludes)
 
 
+def open_exclude_db(db_path):
+    """Opens (creating if needed) the index of transactions to exclude
+
+    :param db_path: Path to SQLite database (or ":memory:")
+    :return: Database connection
+    """
+
+    db = sqlite3.connect(db_path)
+    db.executescript(EXCLUDE_SCHEMA)
+    return db
+
+
+def import_excludes(db, exc_path):
+    """Adds an EveryAction contribution report to the exclusion index
+
+    Reports are identified by content hash, so ones already imported are
+    skipped without being decoded. A transaction listed in several reports
+    keeps the amount from the newest (by file modification time), whatever
+    order the reports are imported in.
+
+    :param db: Exclusion index, from open_exclude_db
+    :param exc_path: Path to EveryAction contribution report
+    """
+
+    digest = hashlib.sha256()
+    with exc_path.open("rb") as exc_file:
+        for block in iter(lambda: exc_file.read(1 << 20), b""):
+            digest.update(block)
+
+    query = "SELECT 1 FROM reports WHERE digest = ?"
+    if db.execute(query, (digest.hexdigest(),)).fetchone():
+        print(f"⏭️ {exc_path} (already imported)")
+        return
+
+    excludes = read_excludes(exc_path)
+    mtime_ns = exc_path.stat().st_mtime_ns
+    with db:
+        db.executemany(
+            "INSERT INTO excludes (nb_id, cents, report_mtime_ns)"
+            " VALUES (?, ?, ?) ON CONFLICT (nb_id) DO UPDATE"
+            " SET cents = excluded.cents,"
+            " report_mtime_ns = excluded.report_mtime_ns"
+            " WHERE excluded.report_mtime_ns >= excludes.report_mtime_ns",
+            (
+                (nb_id, to_cents(amount), mtime_ns)
+                for nb_id, amount in excludes.items()
+            ),
+        )
+        db.execute(
+            "INSERT INTO reports (digest, name, transactions) VALUES (?, ?, ?)",
+            (digest.hexdigest(), exc_path.name, len(excludes)),
+        )
+
+
 def read_excludes(exc_path):
     """Reads EveryAction contribution report to exclude
 
@@ -179,15 +269,12 @@ def convert_file(nb_path, ea_path, excludes):
 
     :param nb_path: Path to NationBuilder CSV
     :param ea_path: Path to EveryAction CSV
-    :param excludes: Dict of NB transaction IDs/amounts to exclude
+    :param excludes: Exclusion index, from open_exclude_db
     """
 
     print(f"⬅️ {nb_path}")
     print(f"▶️ {ea_path}")
 
-    def money(s):
-        return float(s.replace("$", "").replace(",", ""))
-
     with nb_path.open() as nb_file:
         nb_reader = csv.DictReader(nb_file)
         with ea_path.open("w") as ea_file:
@@ -201,13 +288,15 @@ def convert_file(nb_path, ea_path, excludes):
                 ea_row = convert_nb_row(nb_row)
                 nb_id = ea_row[EA_NB_ID]
                 amount = ea_row[EA_AMOUNT]
-                exc_amount = excludes.get(nb_id)
-                if not exc_amount:
+                query = "SELECT cents FROM excludes WHERE nb_id = ?"
+                exc_row = excludes.execute(query, (nb_id,)).fetchone()
+                if not exc_row:
                     ea_writer.writerow(sanitize_ea_row(ea_row))
-                elif money(exc_amount) == money(amount):
+                elif exc_row[0] == to_cents(amount):
                     exc_count += 1
                 else:
-                    print(f"💥 NB# {nb_id}: ${amount} != prior ${exc_amount}")
+                    prior = f"{exc_row[0] / 100:,.2f}"
+                    print(f"💥 NB# {nb_id}: ${amount} != prior ${prior}")
                     raise SystemExit(1)
                 row_count += 1
 
@@ -286,6 +375,16 @@ def sanitize_ea_row(row):
     return out
 
 
+def to_cents(amount):
+    """Converts a dollar amount from CSV to integer cents
+
+    :param amount: Text like "$1,234.50"
+    :return: Integer cents, like 123450
+    """
+
+    return round(float(amount.replace("$", "").replace(",", "")) * 100)
+
+
 def to_bool(value):
     """Converts text value from CSV to boolean
 
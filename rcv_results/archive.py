@@ -0,0 +1,319 @@
+"""Columnar (Arrow / Parquet) archive of many elections, for analytics"""
+
+import signal
+from pathlib import Path
+from typing import Dict, List, Mapping, Union
+
+import attr
+import click
+import numpy as np
+import pyarrow as pa  # type: ignore
+import pyarrow.parquet as pq  # type: ignore
+
+from rcv_results import parse_xml, rcv_data, report_formats
+
+# Tables making up an archive directory, each one file per format
+_TABLES = ("elections", "rounds", "choices", "transfers")
+_SUFFIXES = {"arrow": ".arrow", "parquet": ".parquet"}
+
+_NAME_TYPE = pa.dictionary(pa.int32(), pa.string())
+
+_SCHEMAS = {
+    "elections": pa.schema(
+        [
+            ("key", pa.string()),
+            ("title_text", pa.string()),
+            ("rcv_text", pa.string()),
+            ("status_text", pa.string()),
+            ("time_text", pa.string()),
+            ("precinct_text", pa.string()),
+        ]
+    ),
+    "rounds": pa.schema(
+        [
+            ("election", pa.int32()),
+            ("round", pa.int32()),
+            ("message", pa.string()),
+            ("rule", pa.string()),
+        ]
+    ),
+    "choices": pa.schema(
+        [
+            ("election", pa.int32()),
+            ("round", pa.int32()),
+            ("choice", _NAME_TYPE),
+            ("incoming", pa.float64()),
+            ("seated", pa.bool_()),
+            ("status_text", pa.string()),
+            ("action_text", pa.string()),
+        ]
+    ),
+    "transfers": pa.schema(
+        [
+            ("election", pa.int32()),
+            ("round", pa.int32()),
+            ("source", _NAME_TYPE),
+            ("dest", _NAME_TYPE),
+            ("votes", pa.float64()),
+        ]
+    ),
+}
+
+
+@attr.define
+class Archive:
+    """Flattened results of many elections, as Arrow tables
+
+    Elections are numbered by row in `elections`; the other tables have a
+    row per round, per (round, choice), and per elimination transfer, with
+    `election` and `round` (0-based) columns, sorted by those columns.
+    Choice names are dictionary-encoded, sharing one dictionary.
+    """
+
+    elections: pa.Table = attr.Factory(
+        lambda: _SCHEMAS["elections"].empty_table()
+    )
+    rounds: pa.Table = attr.Factory(lambda: _SCHEMAS["rounds"].empty_table())
+    choices: pa.Table = attr.Factory(lambda: _SCHEMAS["choices"].empty_table())
+    transfers: pa.Table = attr.Factory(
+        lambda: _SCHEMAS["transfers"].empty_table()
+    )
+    _key_index: Dict[str, int] = attr.field(init=False, eq=False, repr=False)
+
+    def __attrs_post_init__(self):
+        self._key_index = {k: i for i, k in enumerate(self.keys())}
+
+    def keys(self) -> List[str]:
+        """Returns the election keys, in archive order"""
+
+        return self.elections["key"].to_pylist()
+
+    def election(self, key: str) -> rcv_data.Election:
+        """Rebuilds one rcv_data.Election from the archive"""
+
+        index = self._key_index[key]
+        meta = self.elections.slice(index, 1).to_pylist()[0]
+        election = rcv_data.Election(
+            title_text=meta["title_text"],
+            rcv_text=meta["rcv_text"],
+            status_text=meta["status_text"],
+            time_text=meta["time_text"],
+            precinct_text=meta["precinct_text"],
+        )
+
+        for row in _rows(self.rounds, index).to_pylist():
+            round = rcv_data.Round(row["message"], rule=row["rule"])
+            election.rounds.append(round)
+        for row in _rows(self.choices, index).to_pylist():
+            election.rounds[row["round"]].choices[row["choice"]] = (
+                rcv_data.RoundChoice(
+                    incoming=row["incoming"],
+                    status_text=row["status_text"],
+                    action_text=row["action_text"],
+                    seated=row["seated"],
+                )
+            )
+        for row in _rows(self.transfers, index).to_pylist():
+            source = election.rounds[row["round"]].choices[row["source"]]
+            source.elimination[row["dest"]] = row["votes"]
+
+        return election
+
+
+def from_elections(elections: Mapping[str, rcv_data.Election]) -> Archive:
+    """Flattens elections (by key, e.g. file name) into an Archive"""
+
+    columns: Dict[str, Dict[str, list]] = {
+        table: {name: [] for name in _SCHEMAS[table].names} for table in _TABLES
+    }
+    names: Dict[str, int] = {}  # Shared dictionary of choice names
+
+    for e, (key, election) in enumerate(elections.items()):
+        meta = columns["elections"]
+        meta["key"].append(key)
+        for field in _SCHEMAS["elections"].names[1:]:
+            meta[field].append(getattr(election, field))
+
+        for r, round in enumerate(election.rounds):
+            _append(
+                columns["rounds"],
+                election=e,
+                round=r,
+                message=round.message,
+                rule=round.rule,
+            )
+            for name, choice in round.choices.items():
+                _append(
+                    columns["choices"],
+                    election=e,
+                    round=r,
+                    choice=names.setdefault(name, len(names)),
+                    incoming=choice.incoming,
+                    seated=choice.seated,
+                    status_text=choice.status_text,
+                    action_text=choice.action_text,
+                )
+                for dest, votes in choice.elimination.items():
+                    _append(
+                        columns["transfers"],
+                        election=e,
+                        round=r,
+                        source=names.setdefault(name, len(names)),
+                        dest=names.setdefault(dest, len(names)),
+                        votes=votes,
+                    )
+
+    dictionary = pa.array(list(names), pa.string())
+    tables: Dict[str, pa.Table] = {}
+    for table in _TABLES:
+        schema = _SCHEMAS[table]
+        arrays = []
+        for field in schema:
+            values = columns[table][field.name]
+            if field.type == _NAME_TYPE:
+                indices = pa.array(values, pa.int32())
+                arrays.append(
+                    pa.DictionaryArray.from_arrays(indices, dictionary)
+                )
+            else:
+                arrays.append(pa.array(values, field.type))
+        tables[table] = pa.Table.from_arrays(arrays, schema=schema)
+
+    return Archive(**tables)
+
+
+def write_archive(
+    archive: Archive, out_dir: Union[str, Path], file_format: str = "arrow"
+) -> None:
+    """Writes an archive as one file per table
+
+    :param archive: Tables to write
+    :param out_dir: Directory to write (created if needed)
+    :param file_format: "arrow" (uncompressed IPC, to memory-map without
+        copies) or "parquet" (compressed, for exchange with other tools)
+    """
+
+    if file_format not in _SUFFIXES:
+        raise ValueError(f'Unknown archive format "{file_format}"')
+
+    out_path = Path(out_dir)
+    out_path.mkdir(parents=True, exist_ok=True)
+    for table in _TABLES:
+        data = getattr(archive, table)
+        path = out_path / f"{table}{_SUFFIXES[file_format]}"
+        temp_path = path.with_name(f".{path.name}.tmp")
+        if file_format == "arrow":
+            with pa.OSFile(str(temp_path), "wb") as sink:
+                with pa.ipc.new_file(sink, data.schema) as writer:
+                    writer.write_table(data)
+        else:
+            pq.write_table(data, temp_path)
+        temp_path.replace(path)
+
+
+def open_archive(archive_dir: Union[str, Path]) -> Archive:
+    """Opens an archive written by write_archive
+
+    Arrow files are memory-mapped, so opening costs almost nothing and
+    fixed-width columns are read in place; Parquet files are decoded.
+    """
+
+    archive_path = Path(archive_dir)
+    tables: Dict[str, pa.Table] = {}
+    for table in _TABLES:
+        arrow_path = archive_path / f"{table}.arrow"
+        if arrow_path.exists():
+            source = pa.memory_map(str(arrow_path), "r")
+            data = pa.ipc.open_file(source).read_all()
+        else:
+            parquet_path = archive_path / f"{table}.parquet"
+            data = pq.read_table(parquet_path, memory_map=True)
+            data = data.unify_dictionaries().combine_chunks()
+        tables[table] = data
+    return Archive(**tables)
+
+
+def round1_leader_lost(archive: Archive) -> List[str]:
+    """Returns keys of elections where the first-round leader didn't win
+
+    Elections without any seated candidate (e.g. still counting) are
+    skipped; if the lead is tied, the candidate listed last is the leader.
+    The whole query runs on column arrays, without per-row Python.
+    """
+
+    choices = archive.choices
+    election = _numpy(choices, "election")
+    round = _numpy(choices, "round")
+    incoming = _numpy(choices, "incoming")
+    seated = _numpy(choices, "seated")
+    choice_col = choices["choice"].combine_chunks()
+    choice = choice_col.indices.to_numpy()
+    spoiled = np.isin(
+        choice_col.dictionary.to_numpy(zero_copy_only=False),
+        list(rcv_data.SPOILED_CHOICES),
+    )
+
+    # Highest first-round candidate per election (the last after sorting)
+    first = np.flatnonzero((round == 0) & ~spoiled[choice])
+    first = first[np.lexsort((incoming[first], election[first]))]
+    last = np.append(election[first][1:] != election[first][:-1], True)
+    leaders = first[last]
+
+    # Leaders not among (election, choice) pairs seated in any round
+    width = len(spoiled)
+    winners = election[seated].astype(np.int64) * width + choice[seated]
+    leader_keys = election[leaders].astype(np.int64) * width + choice[leaders]
+    decided = np.isin(election[leaders], election[seated])
+    lost = decided & ~np.isin(leader_keys, winners)
+
+    keys = archive.elections["key"]
+    return keys.take(pa.array(election[leaders][lost])).to_pylist()
+
+
+def _append(columns: Dict[str, list], **values) -> None:
+    for name, value in values.items():
+        columns[name].append(value)
+
+
+def _numpy(table: pa.Table, name: str) -> np.ndarray:
+    """Returns a column as a NumPy array (a view where the layout allows)"""
+
+    column = table[name]
+    if column.num_chunks == 1:
+        column = column.chunk(0)
+    else:
+        column = column.combine_chunks()
+    return column.to_numpy(zero_copy_only=False)
+
+
+def _rows(table: pa.Table, election: int) -> pa.Table:
+    """Returns the rows of a table (sorted by election) for one election"""
+
+    numbers = _numpy(table, "election")
+    start, end = np.searchsorted(numbers, [election, election + 1])
+    return table.slice(start, end - start)
+
+
+@click.command()
+@click.argument("inputs", nargs=-1, required=True)
+@click.option("--out_dir", required=True, help="Archive directory to write")
+@click.option(
+    "--format",
+    "format_",
+    type=click.Choice(sorted(_SUFFIXES)),
+    default="arrow",
+    help="Table file format",
+)
+def main(inputs, out_dir, format_):
+    """Parses Dominion XML reports into a columnar archive"""
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)  # Sane ^C behavior
+
+    elections: Dict[str, rcv_data.Election] = {}
+    for xml_path, _ in report_formats.find_reports(inputs):
+        print(f"⬅️ {xml_path}")
+        elections[str(xml_path)] = parse_xml.parse_file(xml_path)
+
+    write_archive(from_elections(elections), out_dir, format_)
+    print(f"▶️ {out_dir}")
+    print(f"✅ {len(elections)} elections archived")
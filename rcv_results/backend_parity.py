@@ -0,0 +1,185 @@
+"""Checks that every XML backend parses reports (and fails) identically"""
+
+import re
+import signal
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+from xml.etree import ElementTree
+
+import click
+
+from rcv_results import parse_xml, synth_report, xml_backends
+
+# Synthetic report sizes to check: (candidates, voters)
+SIZES = [(2, 1_000), (8, 10_000), (40, 100_000), (150, 1_000_000)]
+
+
+def _first_precinct_twice(text: str) -> str:
+    start = text.index("<precinctGroup ")
+    end = text.index("</precinctGroup>") + len("</precinctGroup>")
+    return text[:end] + text[start:end] + text[end:]
+
+
+def _title_entity(text: str) -> str:
+    doctype = '<!DOCTYPE Report [<!ENTITY where "Entity County">]>\n'
+    text = text.replace("<Report ", doctype + "<Report ", 1)
+    return text.replace('Textbox1="', 'Textbox1="&where; ', 1)
+
+
+def _external_entity(text: str) -> str:
+    doctype = '<!DOCTYPE Report [<!ENTITY where SYSTEM "/etc/hostname">]>\n'
+    text = text.replace("<Report ", doctype + "<Report ", 1)
+    return text.replace('Textbox1="', 'Textbox1="&where; ', 1)
+
+
+# Edits to a valid report, each of which parsers must handle the same way
+MUTATIONS: Dict[str, Callable[[str], str]] = {
+    "original": lambda text: text,
+    "truncated": lambda text: text[: len(text) // 2],
+    "foreign root": lambda text: text.replace(
+        'xmlns="RcvDetailedReport"', 'xmlns="OtherReport"', 1
+    ),
+    "miscounted votes": lambda text: re.sub(
+        r'\bvotes="(\d+)"',
+        lambda m: f'votes="{int(m.group(1)) + 1}"',
+        text,
+        count=1,
+    ),
+    "non-numeric votes": lambda text: re.sub(
+        r'\bvotes="\d+"', 'votes="many"', text, count=1
+    ),
+    "unnamed choice": lambda text: re.sub(
+        r' choiceName1="[^"]*"', "", text, count=1
+    ),
+    "two precincts": _first_precinct_twice,
+    "title entity": _title_entity,
+    "external entity": _external_entity,
+}
+
+
+def _parse_lazy(text: str, backend: str) -> object:
+    election = parse_xml.parse(text, lazy=True, backend=backend)
+    election.rounds  # Rounds (and any errors in them) load on access
+    return election
+
+
+def _parse_file_stream(path: Path, backend: str, lazy: bool) -> object:
+    with path.open("rb") as xml_file:
+        election = parse_xml.parse_file(xml_file, lazy=lazy, backend=backend)
+        election.rounds  # Load while the stream is open
+    return election
+
+
+# Parser entry points to compare, each given (path, text, backend)
+MODES: Dict[str, Callable[[Path, str, str], object]] = {
+    "parse": lambda p, t, b: parse_xml.parse(t, backend=b),
+    "parse(lazy)": lambda p, t, b: _parse_lazy(t, b),
+    "parse_file(str)": lambda p, t, b: parse_xml.parse_file(str(p), backend=b),
+    "parse_file(Path)": lambda p, t, b: parse_xml.parse_file(p, backend=b),
+    "parse_file(stream)": lambda p, t, b: _parse_file_stream(p, b, False),
+    "parse_file(lazy)": lambda p, t, b: parse_xml.parse_file(
+        p, lazy=True, backend=b
+    ).rounds,
+    "parse_file(stream, lazy)": lambda p, t, b: _parse_file_stream(p, b, True),
+}
+
+
+def _outcome(
+    mode: Callable[[Path, str, str], object],
+    path: Path,
+    text: str,
+    backend: str,
+) -> Tuple:
+    """Returns ("ok", result) or the exception (XML errors by type only)"""
+
+    try:
+        return ("ok", mode(path, text, backend))
+    except ElementTree.ParseError:
+        return ("ParseError",)  # Wording varies by library
+    except Exception as exc:
+        return (type(exc).__name__, str(exc))
+
+
+def check_report(
+    xml_path: Path, work_dir: Path, mutate: bool = True
+) -> List[str]:
+    """Parses a report (and broken variants) with every backend and mode
+
+    :param xml_path: Report to check
+    :param work_dir: Where to write mutated copies
+    :param mutate: Also check the MUTATIONS of the report
+    :return: Descriptions of results that differ from the stdlib backend's
+    """
+
+    text = xml_path.read_text(encoding="utf-8")
+    mismatches = []
+    for mutation, edit in MUTATIONS.items():
+        if mutation != "original" and not mutate:
+            continue
+
+        path = xml_path
+        if mutation != "original":
+            name = mutation.replace(" ", "_")
+            path = work_dir / f"{xml_path.stem}-{name}.xml"
+            path.write_text(edit(text), encoding="utf-8")
+
+        for mode_name, mode in MODES.items():
+            expected = _outcome(mode, path, edit(text), "stdlib")
+            for backend in xml_backends.BACKENDS:
+                actual = _outcome(mode, path, edit(text), backend)
+                if actual != expected:
+                    summary = actual if actual[0] != "ok" else "(election)"
+                    mismatches.append(
+                        f"{xml_path.name} {mutation} {mode_name}: "
+                        f"{backend} gave {summary}, stdlib {expected[:2]}"
+                    )
+
+    return mismatches
+
+
+def check_all(work_dir: Path, xml_paths: List[Path]) -> Dict[str, List[str]]:
+    """Checks synthetic reports of each size (SIZES), then given reports
+
+    Mutations are checked on all but the largest synthetic report.
+
+    :return: Mismatches (see check_report) by report name
+    """
+
+    results = {}
+    for candidates, voters in SIZES:
+        xml_path = work_dir / f"synth-{candidates}.xml"
+        with xml_path.open("w", encoding="utf-8") as out_file:
+            synth_report.write_report(out_file, candidates, voters=voters)
+        mutate = candidates < max(c for c, _ in SIZES)
+        results[xml_path.name] = check_report(xml_path, work_dir, mutate)
+    for xml_path in xml_paths:
+        results[str(xml_path)] = check_report(xml_path, work_dir)
+    return results
+
+
+@click.command()
+@click.argument("xml_files", nargs=-1)
+@click.option("--work_dir", help="Where to keep generated reports")
+def main(xml_files, work_dir):
+    """Compares XML backends on synthetic and given Dominion reports"""
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)  # Sane ^C behavior
+
+    if len(xml_backends.BACKENDS) < 2:
+        print("💥 Only one XML backend installed (pip install .[lxml])")
+        raise SystemExit(1)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        work_path = Path(work_dir or temp_dir)
+        work_path.mkdir(parents=True, exist_ok=True)
+        results = check_all(work_path, [Path(f) for f in xml_files])
+
+    for name, mismatches in results.items():
+        for text in mismatches:
+            print(f"💥 {text}")
+        if not mismatches:
+            print(f"✅ {name}: {', '.join(xml_backends.BACKENDS)} agree")
+
+    if any(results.values()):
+        raise SystemExit(1)
@@ -0,0 +1,185 @@
+"""Running tally of ranked ballot patterns, updated batch by batch"""
+
+import json
+import os
+import signal
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple, Union
+
+import attr
+import click
+import numpy as np
+
+from rcv_results import cvr_store, rcv_data, tabulate
+
+# Tally patterns are stored as rows of this type (room for many candidates)
+_DTYPE = np.dtype(np.int16)
+
+
+@attr.define
+class BallotTally:
+    """Counts of distinct (canonical) ranking patterns for one contest
+
+    Adding a batch of ballots takes time in proportion to the batch, not
+    to everything counted so far, and tabulating takes time in proportion
+    to the number of distinct patterns, not ballots. Retracted batches are
+    subtracted; an adjusted batch is its old version subtracted and its new
+    version added. Tallies of separate batches can also be merged.
+    """
+
+    ranks: int  # Rank positions per ballot
+    candidates: List[str] = attr.Factory(list)  # Names, by ranking index
+    counts: Dict[bytes, int] = attr.Factory(dict)  # Pattern row -> ballots
+
+    def ballots(self) -> int:
+        return sum(self.counts.values())
+
+    def add(
+        self, ballots: np.ndarray, candidates: Sequence[str], sign: int = 1
+    ) -> None:
+        """Adds (or with sign=-1, subtracts) a batch of ballots
+
+        :param ballots: Ballots x rank positions array, as for tabulate
+        :param candidates: Names for the candidate indexes in `ballots`
+            (matched by name, so batches may list candidates differently)
+        :param sign: 1 to add the batch, -1 to subtract it
+        """
+
+        if ballots.ndim != 2 or ballots.shape[1] != self.ranks:
+            raise ValueError(f"Ballots {ballots.shape}, tally has {self.ranks}")
+        renumbered, new_names = self._renumber(ballots, candidates)
+        patterns, counts = tabulate.unique_ballots(renumbered)
+        self._apply(patterns, counts * sign, new_names)
+
+    def merge(self, other: "BallotTally", sign: int = 1) -> None:
+        """Adds (or with sign=-1, subtracts) another tally into this one"""
+
+        if other.ranks != self.ranks:
+            raise ValueError(f"Tally has {other.ranks} ranks, not {self.ranks}")
+        patterns, counts = other.arrays()
+        renumbered, new_names = self._renumber(patterns, other.candidates)
+        self._apply(renumbered, counts * sign, new_names)
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (patterns, counts) arrays, as from unique_ballots"""
+
+        patterns = np.frombuffer(b"".join(self.counts), _DTYPE)
+        counts = np.fromiter(self.counts.values(), np.int64, len(self.counts))
+        return patterns.reshape(-1, self.ranks), counts
+
+    def election(self, seats: int = 1) -> rcv_data.Election:
+        """Tabulates the ballots so far (IRV, or STV if seats > 1)"""
+
+        patterns, counts = self.arrays()
+        if seats == 1:
+            return tabulate.tabulate_irv(patterns, self.candidates, counts)
+        return tabulate.tabulate_stv(
+            patterns, self.candidates, seats, weights=counts
+        )
+
+    def _renumber(
+        self, ballots: np.ndarray, candidates: Sequence[str]
+    ) -> Tuple[np.ndarray, List[str]]:
+        """Returns (ballots in tally candidate numbering, names to add)"""
+
+        if ballots.size and ballots.max() >= len(candidates):
+            raise ValueError(f"Ballot index {ballots.max()} >= candidates")
+        if ballots.size and ballots.min() < tabulate.OVERVOTE:
+            raise ValueError(f"Bad ballot value {ballots.min()}")
+
+        index = {name: i for i, name in enumerate(self.candidates)}
+        lookup = np.zeros(len(candidates) + 2, _DTYPE)
+        lookup[tabulate.SKIPPED] = tabulate.SKIPPED
+        lookup[tabulate.OVERVOTE] = tabulate.OVERVOTE
+        for i, name in enumerate(candidates):
+            lookup[i] = index.setdefault(name, len(index))
+        new_names = list(index)[len(self.candidates) :]
+        return lookup[np.asarray(ballots, np.intp)], new_names
+
+    def _apply(
+        self, patterns: np.ndarray, counts: np.ndarray, new_names: List[str]
+    ) -> None:
+        """Adds signed pattern counts (in tally numbering), all or nothing"""
+
+        totals = self.counts
+        updated: Dict[bytes, int] = {}
+        for row, count in zip(patterns.astype(_DTYPE, copy=False), counts):
+            key = row.tobytes()
+            updated[key] = updated.get(key, totals.get(key, 0)) + int(count)
+
+        negative = sum(1 for total in updated.values() if total < 0)
+        if negative:
+            raise ValueError(f"{negative} ballot patterns would go below zero")
+
+        self.candidates.extend(new_names)
+        for key, total in updated.items():
+            if total:
+                totals[key] = total
+            else:
+                del totals[key]
+
+
+def save_tally(tally: BallotTally, path: Union[str, Path]) -> None:
+    """Writes a tally to an .npz file (atomically)"""
+
+    path = Path(path)
+    patterns, counts = tally.arrays()
+    meta = dict(ranks=tally.ranks, candidates=tally.candidates)
+    temp_path = path.with_name(f".{path.name}.tmp")
+    with temp_path.open("wb") as temp_file:
+        np.savez(
+            temp_file,
+            meta=np.array(json.dumps(meta)),
+            patterns=patterns,
+            counts=counts,
+        )
+    os.replace(temp_path, path)
+
+
+def load_tally(path: Union[str, Path]) -> BallotTally:
+    """Reads a tally written by save_tally"""
+
+    with np.load(path) as data:
+        meta = json.loads(str(data["meta"]))
+        patterns = data["patterns"].astype(_DTYPE, copy=False)
+        counts = data["counts"].tolist()
+    keys = [row.tobytes() for row in patterns]
+    return BallotTally(
+        ranks=meta["ranks"],
+        candidates=meta["candidates"],
+        counts=dict(zip(keys, counts)),
+    )
+
+
+@click.command()
+@click.argument("store_dirs", nargs=-1)
+@click.option("--tally", "tally_path", required=True, help="Tally .npz file")
+@click.option("--retract", is_flag=True, help="Subtract these batches")
+@click.option("--seats", type=int, default=1, help="Winners (STV if 2+)")
+def main(store_dirs, tally_path, retract, seats):
+    """Updates a running tally with ballot stores (from rcv_ingest_cvr)"""
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)  # Sane ^C behavior
+
+    tally = None
+    if Path(tally_path).exists():
+        tally = load_tally(tally_path)
+        print(f"⬅️ {tally_path}: {tally.ballots()} ballots")
+
+    for store_dir in store_dirs:
+        store = cvr_store.open_store(store_dir)
+        tally = tally or BallotTally(ranks=store.rankings.shape[1])
+        tally.add(store.rankings, store.candidates, -1 if retract else 1)
+        verb = "Retracted" if retract else "Added"
+        print(f"🗳️ {verb} {len(store.rankings)} ballots: {store_dir}")
+
+    if not tally:
+        raise click.UsageError("No tally yet, and no ballot stores to add")
+    if store_dirs:
+        save_tally(tally, tally_path)
+        print(f"▶️ {tally_path}: {tally.ballots()} ballots")
+
+    if tally.ballots():
+        final = tally.election(seats).rounds[-1]
+        winners = [n for n, c in final.choices.items() if c.seated]
+        print(f"✅ {final.message}: {', '.join(winners)}")
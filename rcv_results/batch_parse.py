@@ -0,0 +1,109 @@
+"""Script to parse many XML reports in parallel into JSON"""
+
+import concurrent.futures
+import json
+import os
+import signal
+import time
+import traceback
+from pathlib import Path
+from typing import Tuple
+
+import attr
+import click
+
+from rcv_results import report_formats
+
+
+@click.command()
+@click.argument("inputs", nargs=-1, required=True)
+@click.option("--out_dir", default=".", help="Directory for JSON output")
+@click.option("--jobs", type=int, help="Worker processes (default: all CPUs)")
+@click.option("--summary", default="summary.json", help="Summary file name")
+def main(inputs, out_dir, jobs, summary):
+    """Parses XML report files and/or directories of them to JSON
+
+    Files are parsed by format (see report_formats); files in no supported
+    format are reported as errors without being parsed.
+    """
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)  # Sane ^C behavior
+
+    xml_paths = [path for path, _ in report_formats.find_reports(inputs)]
+
+    if not xml_paths:
+        print(f"💥 No XML files found in: {' '.join(inputs)}")
+        raise SystemExit(1)
+
+    out_path = Path(out_dir)
+    out_path.mkdir(parents=True, exist_ok=True)
+    json_paths = [out_path / f"{p.stem}.json" for p in xml_paths]
+    if len(set(json_paths)) != len(json_paths):
+        # Same-named files from different directories; keep them apart
+        json_paths = [
+            out_path / f"{p.stem}-{i:05d}.json" for i, p in enumerate(xml_paths)
+        ]
+
+    results = []
+    start_time = time.monotonic()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            pool.submit(parse_to_json, xml_path, json_path): xml_path
+            for xml_path, json_path in zip(xml_paths, json_paths)
+        }
+        for future in concurrent.futures.as_completed(futures):
+            xml_path = futures[future]
+            try:
+                seconds, error = future.result()
+            except Exception as exc:  # Worker died (or unpicklable result)
+                seconds, error = 0.0, f"{type(exc).__name__}: {exc}"
+
+            if error:
+                print(f"💥 {xml_path}: {error.splitlines()[-1]}")
+            else:
+                print(f"✅ {xml_path} ({seconds:.2f}s)")
+            results.append(
+                dict(xml=str(xml_path), seconds=seconds, error=error)
+            )
+
+    results.sort(key=lambda r: r["xml"])
+    error_count = sum(1 for r in results if r["error"])
+    elapsed = time.monotonic() - start_time
+    summary_path = out_path / summary
+    with summary_path.open("w") as summary_file:
+        json.dump(dict(seconds=elapsed, files=results), summary_file, indent=1)
+
+    print()
+    print(f"▶️ {summary_path}")
+    print(
+        f"✅ {len(results)} files - {error_count} errors = "
+        f"{len(results) - error_count} parsed in {elapsed:.1f}s"
+    )
+    if error_count:
+        raise SystemExit(1)
+
+
+def parse_to_json(xml_path: Path, json_path: Path) -> Tuple[float, str]:
+    """Parses one report and writes compact JSON (runs in a worker process)
+
+    :param xml_path: Path to XML report (any format in report_formats)
+    :param json_path: Path to JSON output
+    :return: (Parse time in seconds, error text or "")
+    """
+
+    start_time = time.monotonic()
+    try:
+        election = report_formats.parse_report(xml_path)
+    except Exception:
+        return time.monotonic() - start_time, traceback.format_exc()
+
+    seconds = time.monotonic() - start_time
+    temp_path = json_path.with_name(f".{json_path.name}.tmp")
+    try:
+        with temp_path.open("w") as json_file:
+            json.dump(attr.asdict(election), json_file, separators=(",", ":"))
+        os.replace(temp_path, json_path)
+    except OSError:
+        return seconds, traceback.format_exc()
+
+    return seconds, ""
@@ -0,0 +1,195 @@
+"""Benchmarks parse_xml modes on synthetic reports (time and peak memory)"""
+
+import concurrent.futures
+import contextlib
+import functools
+import json
+import multiprocessing
+import re
+import resource
+import signal
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import click
+
+from rcv_results import backend_parity, parse_xml, synth_report, xml_backends
+
+# Report sizes to benchmark: (name, candidates, precincts, voters)
+SIZES = [
+    ("typical", 40, 1, 100_000),
+    ("wide", 150, 1, 1_000_000),
+    ("precincts", 20, 200, 5_000),
+]
+
+
+def _parse_text(path: str, backend: str) -> object:
+    return parse_xml.parse(Path(path).read_text(), backend=backend)
+
+
+def _parse_file_lazy(path: str, backend: str) -> object:
+    election = parse_xml.parse_file(path, lazy=True, backend=backend)
+    election.rounds  # Time the deferred round parsing too
+    return election
+
+
+# Parser entry points, by mode name; each returns when the parse is done
+MODES: Dict[str, Callable[[str], object]] = {}
+for _backend in xml_backends.BACKENDS:
+    MODES[f"parse[{_backend}]"] = functools.partial(
+        _parse_text, backend=_backend
+    )
+    MODES[f"parse_file[{_backend}]"] = functools.partial(
+        parse_xml.parse_file, backend=_backend
+    )
+    MODES[f"parse_file_lazy[{_backend}]"] = functools.partial(
+        _parse_file_lazy, backend=_backend
+    )
+MODES["parse_precinct_file"] = parse_xml.parse_precinct_file
+MODES["parse_precinct_file_jobs"] = functools.partial(
+    parse_xml.parse_precinct_file, jobs=None
+)
+
+# Modes that handle only single-precinct reports
+_SINGLE_PRECINCT_PREFIXES = ("parse[", "parse_file[", "parse_file_lazy[")
+
+
+def run_mode(mode: str, xml_path: str) -> Tuple[float, int]:
+    """Parses a file in one mode (in a fresh worker process)
+
+    :return: (Seconds, peak memory growth in KiB while parsing, not
+        counting any pool workers the mode uses)
+    """
+
+    base_kib = _peak_kib()
+    start_time = time.perf_counter()
+    MODES[mode](xml_path)
+    seconds = time.perf_counter() - start_time
+    return seconds, _peak_kib() - base_kib
+
+
+def _peak_kib() -> int:
+    """Returns this process's peak resident memory in KiB"""
+
+    # Linux keeps ru_maxrss across exec (so a spawned worker would start
+    # at its parent's peak), but VmHWM is per address space
+    with contextlib.suppress(OSError):
+        status = Path("/proc/self/status").read_text()
+        match = re.search(r"^VmHWM:\s*(\d+) kB", status, re.M)
+        if match:
+            return int(match.group(1))
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def benchmark(
+    work_dir: Path, repeat: int = 3, sizes: Optional[List[str]] = None
+) -> List[Dict]:
+    """Generates reports and times every applicable mode on each
+
+    Each run gets its own spawned process, so peak memory isn't shared
+    between runs; the fastest run counts.
+    """
+
+    results = []
+    spawn = multiprocessing.get_context("spawn")
+    for name, candidates, precincts, voters in SIZES:
+        if sizes and name not in sizes:
+            continue
+
+        xml_path = work_dir / f"synth-{name}.xml"
+        if not xml_path.exists():
+            with xml_path.open("w", encoding="utf-8") as out_file:
+                synth_report.write_report(
+                    out_file, candidates, None, precincts, voters
+                )
+        megabytes = xml_path.stat().st_size / 1e6
+        if precincts == 1:
+            mismatched = backend_parity.check_report(xml_path, work_dir)
+            if mismatched:
+                raise ValueError(f"{name}: {'; '.join(mismatched)}")
+
+        for mode in MODES:
+            if precincts > 1 and mode.startswith(_SINGLE_PRECINCT_PREFIXES):
+                continue
+
+            runs: List[Tuple[float, int]] = []
+            for _ in range(repeat):
+                with concurrent.futures.ProcessPoolExecutor(
+                    max_workers=1, mp_context=spawn
+                ) as pool:
+                    future = pool.submit(run_mode, mode, str(xml_path))
+                    runs.append(future.result())
+
+            seconds = min(r[0] for r in runs)
+            results.append(
+                dict(
+                    size=name,
+                    mode=mode,
+                    megabytes=round(megabytes, 2),
+                    seconds=round(seconds, 4),
+                    mb_per_second=round(megabytes / seconds, 2),
+                    peak_mib=round(max(r[1] for r in runs) / 1024, 1),
+                )
+            )
+
+    return results
+
+
+def regressions(
+    results: List[Dict], baseline: List[Dict], tolerance: float
+) -> List[str]:
+    """Returns descriptions of results slower than baseline by > tolerance"""
+
+    before = {(r["size"], r["mode"]): r for r in baseline}
+    slower = []
+    for result in results:
+        old = before.get((result["size"], result["mode"]))
+        if old and result["mb_per_second"] < old["mb_per_second"] * (
+            1 - tolerance
+        ):
+            slower.append(
+                f"{result['size']}/{result['mode']}: "
+                f"{result['mb_per_second']} MB/s < {old['mb_per_second']}"
+            )
+    return slower
+
+
+@click.command()
+@click.option("--work_dir", help="Where to keep generated reports")
+@click.option("--repeat", type=int, default=3, help="Runs per mode (best)")
+@click.option("--size", "sizes", multiple=True, help="Only these sizes")
+@click.option("--out", help="JSON file for results")
+@click.option("--baseline", help="Earlier results JSON to compare against")
+@click.option("--tolerance", default=0.2, help="Allowed throughput drop")
+def main(work_dir, repeat, sizes, out, baseline, tolerance):
+    """Times parse_xml modes on synthetic reports, checking for regressions"""
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)  # Sane ^C behavior
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        work_path = Path(work_dir or temp_dir)
+        work_path.mkdir(parents=True, exist_ok=True)
+        results = benchmark(work_path, repeat, list(sizes))
+
+    for r in results:
+        print(
+            f"⏱️ {r['size']:>10} {r['mode']:<25} {r['megabytes']:8.1f}MB "
+            f"{r['seconds']:8.3f}s {r['mb_per_second']:7.1f}MB/s "
+            f"{r['peak_mib']:7.1f}MiB peak"
+        )
+
+    if out:
+        Path(out).write_text(json.dumps(results, indent=1))
+        print(f"▶️ {out}")
+
+    if baseline:
+        slower = regressions(
+            results, json.loads(Path(baseline).read_text()), tolerance
+        )
+        for text in slower:
+            print(f"💥 {text}")
+        if slower:
+            raise SystemExit(1)
+        print(f"✅ No regressions vs {baseline}")
@@ -0,0 +1,233 @@
+"""Bootstrap resampling of ballots, to gauge how robust an outcome is"""
+
+import collections
+import concurrent.futures
+import os
+import signal
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import attr
+import click
+import numpy as np
+
+from rcv_results import cvr_store, rcv_data, tabulate
+
+# Per-worker state, set up by _init_worker (or directly, for jobs=1)
+_worker: Dict[str, Any] = {}
+
+
+@attr.define
+class Sensitivity:
+    """Outcomes of re-tabulating resampled ballots, next to the real count
+
+    Margins are from the final round, always for the baseline winner(s):
+    the lowest baseline winner's votes (zero if eliminated earlier) minus
+    the highest other candidate's, as a fraction of votes for candidates.
+    A resample's margin is negative when the baseline winners lose there.
+    """
+
+    baseline: rcv_data.Election  # Tabulation of the actual ballots
+    baseline_winners: Tuple[str, ...] = ()
+    baseline_margin: float = 0.0
+    win_counts: Dict[Tuple[str, ...], int] = attr.Factory(dict)
+    margins: np.ndarray = attr.Factory(lambda: np.zeros(0))  # Per resample
+
+    def resamples(self) -> int:
+        return len(self.margins)
+
+    def baseline_win_rate(self) -> float:
+        """Returns the fraction of resamples with the baseline winner(s)"""
+
+        hits = self.win_counts.get(self.baseline_winners, 0)
+        return hits / self.resamples() if self.resamples() else 0.0
+
+    def margin_interval(self, level: float = 0.95) -> Tuple[float, float]:
+        """Returns the central interval of resampled margins (NaN if none)"""
+
+        if not self.resamples():
+            return float("nan"), float("nan")
+        tail = (1 - level) / 2
+        low, high = np.quantile(self.margins, [tail, 1 - tail])
+        return float(low), float(high)
+
+
+def analyze(
+    ballots: np.ndarray,
+    candidates: Sequence[str],
+    resamples: int = 1000,
+    seats: int = 1,
+    seed: int = 0,
+    jobs: Optional[int] = None,
+) -> Sensitivity:
+    """Re-tabulates bootstrap resamples of ballots across worker processes
+
+    Ballots are collapsed to distinct patterns first, so a resample is just
+    a multinomial draw of pattern counts, tabulated with weights. Patterns
+    and counts go to workers through shared memory, not pickling. Results
+    depend only on the seed, not on the number of workers.
+
+    :param ballots: Ballots array, as for tabulate.tabulate_irv
+    :param candidates: Candidate names
+    :param resamples: Number of bootstrap resamples
+    :param seats: Winners (1 for IRV, more for STV)
+    :param seed: Random seed
+    :param jobs: Worker processes (None for all CPUs, 1 for inline)
+    """
+
+    if resamples < 1:
+        raise ValueError(f"Bad resample count {resamples}")
+
+    patterns, counts = tabulate.unique_ballots(ballots)
+    baseline = _tabulate(patterns, counts, candidates, seats)
+    winners, margin = _outcome(baseline)
+    result = Sensitivity(baseline, winners, margin)
+    settings = dict(
+        candidates=list(candidates),
+        seats=seats,
+        seed=seed,
+        baseline_winners=winners,
+    )
+
+    outcomes: List[Tuple[Tuple[str, ...], float]] = []
+    if jobs == 1:
+        _worker.update(settings, patterns=patterns, counts=counts)
+        outcomes = _run_resamples(range(resamples))
+    else:
+        blocks = [_share(patterns), _share(counts)]
+        try:
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=jobs,
+                initializer=_init_worker,
+                initargs=([spec for _, spec in blocks], settings),
+            ) as pool:
+                workers = jobs or os.cpu_count() or 1
+                step = max(1, resamples // (workers * 8))
+                chunks = [
+                    range(start, min(start + step, resamples))
+                    for start in range(0, resamples, step)
+                ]
+                for chunk_outcomes in pool.map(_run_resamples, chunks):
+                    outcomes.extend(chunk_outcomes)
+        finally:
+            for block, _ in blocks:
+                block.close()
+                block.unlink()
+
+    result.win_counts = dict(collections.Counter(w for w, _ in outcomes))
+    result.margins = np.array([m for _, m in outcomes])
+    return result
+
+
+def _tabulate(
+    patterns: np.ndarray,
+    counts: np.ndarray,
+    candidates: Sequence[str],
+    seats: int,
+) -> rcv_data.Election:
+    if seats == 1:
+        return tabulate.tabulate_irv(patterns, candidates, counts)
+    return tabulate.tabulate_stv(patterns, candidates, seats, weights=counts)
+
+
+def _outcome(
+    election: rcv_data.Election, baseline_winners: Sequence[str] = ()
+) -> Tuple[Tuple[str, ...], float]:
+    """Returns (winners, final round margin) of a tabulation
+
+    :param election: Tabulation (of the actual ballots or a resample)
+    :param baseline_winners: Candidates whose margin to report (see
+        Sensitivity), by default this tabulation's own winners
+    """
+
+    final = election.rounds[-1].choices
+    votes = {
+        name: choice.incoming
+        for name, choice in final.items()
+        if name not in rcv_data.SPOILED_CHOICES
+    }
+    winners = tuple(name for name, choice in final.items() if choice.seated)
+    measured = baseline_winners or winners
+    others = [v for name, v in votes.items() if name not in measured]
+    lowest_winner = min(votes.get(name, 0.0) for name in measured)
+    total = sum(votes.values())
+    margin = lowest_winner - max(others, default=0.0)
+    return winners, margin / total if total else 0.0
+
+
+def _share(
+    array: np.ndarray,
+) -> Tuple[shared_memory.SharedMemory, Tuple[str, Tuple, str]]:
+    """Copies an array to new shared memory; returns (block, spec)"""
+
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    view = np.ndarray(array.shape, array.dtype, buffer=block.buf)
+    view[...] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+
+def _init_worker(specs: List[Tuple[str, Tuple, str]], settings: Dict):
+    """Attaches a worker process to the shared patterns and counts"""
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    arrays = []
+    for name, shape, dtype in specs:
+        block = shared_memory.SharedMemory(name=name)
+        _worker.setdefault("blocks", []).append(block)  # Keep mapped
+        arrays.append(np.ndarray(shape, dtype, buffer=block.buf))
+    _worker.update(settings, patterns=arrays[0], counts=arrays[1])
+
+
+def _run_resamples(
+    indexes: Sequence[int],
+) -> List[Tuple[Tuple[str, ...], float]]:
+    """Tabulates the given resamples (by index) with worker state"""
+
+    patterns, counts = _worker["patterns"], _worker["counts"]
+    candidates, seats = _worker["candidates"], _worker["seats"]
+    total = int(counts.sum())
+    probabilities = counts / total
+
+    outcomes = []
+    for index in indexes:
+        rng = np.random.default_rng([_worker["seed"], index])
+        weights = rng.multinomial(total, probabilities)
+        used = np.flatnonzero(weights)
+        election = _tabulate(patterns[used], weights[used], candidates, seats)
+        outcomes.append(_outcome(election, _worker["baseline_winners"]))
+    return outcomes
+
+
+@click.command()
+@click.argument("store_dir")
+@click.option("--resamples", type=int, default=1000, help="Resample count")
+@click.option("--seats", type=int, default=1, help="Winners (STV if 2+)")
+@click.option("--seed", type=int, default=0, help="Random seed")
+@click.option("--jobs", type=int, help="Worker processes (default: all CPUs)")
+def main(store_dir, resamples, seats, seed, jobs):
+    """Bootstraps a ballot store (from rcv_ingest_cvr) to test its outcome"""
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)  # Sane ^C behavior
+
+    store = cvr_store.open_store(store_dir)
+    print(f"⬅️ {store.contest}: {len(store.rankings)} ballots")
+    result = analyze(
+        np.asarray(store.rankings),
+        store.candidates,
+        resamples=resamples,
+        seats=seats,
+        seed=seed,
+        jobs=jobs,
+    )
+
+    low, high = result.margin_interval()
+    print(
+        f"🗳️ Baseline: {', '.join(result.baseline_winners)} "
+        f"({len(result.baseline.rounds)} rounds, "
+        f"margin {result.baseline_margin:.2%})"
+    )
+    for winners, count in sorted(
+        result.win_counts.items(), key=lambda item: -item[1]
+    ):
+        print(f"   {count / result.resamples():7.2%} {', '.join(winners)}")
+    print(f"✅ Margin 95% interval: {low:.2%} to {high:.2%}")
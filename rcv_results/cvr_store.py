@@ -0,0 +1,217 @@
+"""Compact on-disk store of ranked ballots from Dominion CVR exports"""
+
+import contextlib
+import json
+import signal
+import zipfile
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import attr
+import click
+import numpy as np
+
+from rcv_results import tabulate
+
+# Files making up a ballot store directory
+_META_FILE = "meta.json"
+_RANKINGS_FILE = "rankings.bin"
+_COLUMN_FILES = {
+    "precinct": "precinct.bin",
+    "tabulator": "tabulator.bin",
+    "batch": "batch.bin",
+}
+
+
+@attr.define
+class BallotStore:
+    """Ranked ballots for one contest, as memory-mapped arrays
+
+    `rankings` is ballots x rank positions of candidate indexes (into
+    `candidates`) or tabulate.SKIPPED / tabulate.OVERVOTE, ready to pass
+    to the tabulate module. The other arrays have one entry per ballot.
+    """
+
+    contest: str = ""  # Contest name
+    candidates: List[str] = attr.Factory(list)  # Names, by ranking index
+    precinct_names: Dict[int, str] = attr.Factory(dict)  # By precinct ID
+    rankings: np.ndarray = attr.Factory(lambda: np.zeros((0, 0), np.int8))
+    precinct: np.ndarray = attr.Factory(lambda: np.zeros(0, np.int32))
+    tabulator: np.ndarray = attr.Factory(lambda: np.zeros(0, np.int32))
+    batch: np.ndarray = attr.Factory(lambda: np.zeros(0, np.int32))
+
+
+def open_store(store_dir: Union[str, Path]) -> BallotStore:
+    """Opens a ballot store written by ingest_cvr_zip (without reading it)"""
+
+    store_path = Path(store_dir)
+    meta = json.loads((store_path / _META_FILE).read_text())
+    count, ranks = meta["ballots"], meta["ranks"]
+
+    def load(name: str, dtype: str, shape: Tuple[int, ...]) -> np.ndarray:
+        if not count:
+            return np.zeros(shape, dtype)  # mmap can't map empty files
+        return np.memmap(store_path / name, dtype, "r", shape=shape)
+
+    store = BallotStore(
+        contest=meta["contest"],
+        candidates=meta["candidates"],
+        precinct_names={int(k): v for k, v in meta["precincts"].items()},
+        rankings=load(_RANKINGS_FILE, meta["dtype"], (count, ranks)),
+    )
+    for column, name in _COLUMN_FILES.items():
+        setattr(store, column, load(name, "int32", (count,)))
+    return store
+
+
+def ingest_cvr_zip(
+    zip_path: Union[str, Path],
+    store_dir: Union[str, Path],
+    contest: str,
+) -> BallotStore:
+    """Streams a Dominion CVR export zip into a ballot store for one contest
+
+    Only one CvrExport*.json member is decoded at a time and rows are
+    appended to disk as they go, so memory use doesn't grow with the number
+    of ballots. Adjudicated ("Modified") marks are used where current.
+
+    :param zip_path: Dominion CVR export (zip of JSON files)
+    :param store_dir: Directory to write (created if needed)
+    :param contest: Contest name (Description) or numeric ID
+    :return: The new ballot store, opened
+    """
+
+    store_path = Path(store_dir)
+    store_path.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(zip_path) as cvr_zip:
+        contests = _read_manifest(cvr_zip, "ContestManifest.json")
+        contest_info = next(
+            (
+                c
+                for c in contests
+                if contest in (c["Description"], str(c["Id"]))
+            ),
+            None,
+        )
+        if not contest_info:
+            raise ValueError(f'Contest "{contest}" not in {zip_path}')
+
+        contest_id = contest_info["Id"]
+        ranks = int(contest_info.get("NumOfRanks") or 1)
+        candidate_ids: Dict[int, int] = {}
+        candidates: List[str] = []
+        for cand in _read_manifest(cvr_zip, "CandidateManifest.json"):
+            if cand["ContestId"] == contest_id:
+                candidate_ids[cand["Id"]] = len(candidates)
+                candidates.append(cand["Description"])
+
+        precinct_names = {
+            p["Id"]: p["Description"]
+            for p in _read_manifest(cvr_zip, "PrecinctPortionManifest.json")
+        }
+
+        dtype = np.int8 if len(candidates) < 128 else np.int16
+        count = 0
+        with contextlib.ExitStack() as stack:
+            rankings_file = stack.enter_context(
+                (store_path / _RANKINGS_FILE).open("wb")
+            )
+            out_files = {
+                column: stack.enter_context((store_path / name).open("wb"))
+                for column, name in _COLUMN_FILES.items()
+            }
+            for member in cvr_zip.namelist():
+                if not Path(member).name.startswith("CvrExport"):
+                    continue
+
+                with cvr_zip.open(member) as member_file:
+                    sessions = json.load(member_file).get("Sessions", [])
+
+                rows = list(
+                    _session_rows(sessions, contest_id, candidate_ids, ranks)
+                )
+                if not rows:
+                    continue
+
+                rankings = np.array([r[0] for r in rows], dtype)
+                rankings_file.write(rankings.tobytes())
+                for i, column in enumerate(_COLUMN_FILES, 1):
+                    values = np.array([r[i] for r in rows], np.int32)
+                    out_files[column].write(values.tobytes())
+                count += len(rows)
+
+    meta = dict(
+        contest=contest_info["Description"],
+        candidates=candidates,
+        precincts=precinct_names,
+        ballots=count,
+        ranks=ranks,
+        dtype=np.dtype(dtype).name,
+    )
+    (store_path / _META_FILE).write_text(json.dumps(meta, indent=1))
+    return open_store(store_path)
+
+
+def _read_manifest(cvr_zip: zipfile.ZipFile, name: str) -> List[Dict]:
+    """Returns the "List" entries of a manifest file in the export zip"""
+
+    member = next((m for m in cvr_zip.namelist() if Path(m).name == name), "")
+    if not member:
+        return []
+    with cvr_zip.open(member) as manifest_file:
+        return json.load(manifest_file).get("List", [])
+
+
+def _session_rows(
+    sessions: List[Dict],
+    contest_id: int,
+    candidate_ids: Dict[int, int],
+    ranks: int,
+) -> Iterator[Tuple[List[int], int, int, int]]:
+    """Yields (rankings, precinct, tabulator, batch) for ballots in a contest"""
+
+    for session in sessions:
+        record = session.get("Modified") or {}
+        if not record.get("IsCurrent"):
+            record = session.get("Original") or {}
+
+        marked: Optional[List[List[int]]] = None
+        for card in record.get("Cards", [record]):
+            for card_contest in card.get("Contests", []):
+                if card_contest.get("Id") != contest_id:
+                    continue
+                marked = marked or [[] for _ in range(ranks)]
+                for mark in card_contest.get("Marks", []):
+                    rank = int(mark.get("Rank", 1)) - 1
+                    cand = candidate_ids.get(mark.get("CandidateId"))
+                    if mark.get("IsVote", True) and cand is not None:
+                        if 0 <= rank < ranks and cand not in marked[rank]:
+                            marked[rank].append(cand)
+
+        if marked is None:
+            continue  # Contest not on this ballot
+
+        skip, over = tabulate.SKIPPED, tabulate.OVERVOTE
+        row = [m[0] if len(m) == 1 else over if m else skip for m in marked]
+        precinct = record.get("PrecinctPortionId") or 0
+        tabulator = session.get("TabulatorId") or 0
+        batch = session.get("BatchId") or 0
+        yield row, precinct, tabulator, batch
+
+
+@click.command()
+@click.argument("cvr_zip")
+@click.option("--contest", required=True, help="Contest name or ID")
+@click.option("--store_dir", required=True, help="Ballot store to write")
+def main(cvr_zip, contest, store_dir):
+    """Converts a Dominion CVR export zip into a compact ballot store"""
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)  # Sane ^C behavior
+
+    print(f"⬅️ {cvr_zip}")
+    store = ingest_cvr_zip(cvr_zip, store_dir, contest)
+    print(f"▶️ {store_dir}")
+    print(
+        f"✅ {store.contest}: {len(store.rankings)} ballots, "
+        f"{len(store.candidates)} candidates, {store.rankings.shape[1]} ranks"
+    )
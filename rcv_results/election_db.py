@@ -0,0 +1,398 @@
+"""SQLite store of many elections, indexed for cross-contest queries"""
+
+import datetime
+import hashlib
+import io
+import json
+import re
+import signal
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import attr
+import click
+
+from rcv_results import parse_xml, rcv_data, report_formats
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS elections (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,  -- Caller's name for the report (e.g. path)
+    digest TEXT NOT NULL,  -- Hash of the source, to skip unchanged imports
+    jurisdiction TEXT NOT NULL,
+    contest TEXT NOT NULL,
+    date TEXT,  -- ISO format (YYYY-MM-DD), if known
+    rounds INTEGER NOT NULL,
+    title_text TEXT NOT NULL,
+    rcv_text TEXT NOT NULL,
+    status_text TEXT NOT NULL,
+    time_text TEXT NOT NULL,
+    precinct_text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS elections_jurisdiction
+    ON elections (jurisdiction, date);
+CREATE INDEX IF NOT EXISTS elections_date ON elections (date);
+
+CREATE TABLE IF NOT EXISTS rounds (
+    election_id INTEGER NOT NULL REFERENCES elections ON DELETE CASCADE,
+    round INTEGER NOT NULL,  -- 1-based
+    message TEXT NOT NULL,
+    rule TEXT NOT NULL,  -- rcv_data.Round.rule
+    PRIMARY KEY (election_id, round)
+);
+
+CREATE TABLE IF NOT EXISTS choices (
+    election_id INTEGER NOT NULL REFERENCES elections ON DELETE CASCADE,
+    round INTEGER NOT NULL,  -- 1-based
+    name TEXT NOT NULL,
+    incoming REAL NOT NULL,
+    standing INTEGER,  -- 1 = most votes this round (NULL for spoilage)
+    seated INTEGER NOT NULL,
+    status_text TEXT NOT NULL,
+    action_text TEXT NOT NULL,
+    PRIMARY KEY (election_id, round, name)
+);
+CREATE INDEX IF NOT EXISTS choices_name ON choices (name, election_id);
+CREATE INDEX IF NOT EXISTS choices_standing
+    ON choices (round, standing, election_id);
+CREATE INDEX IF NOT EXISTS choices_seated
+    ON choices (election_id) WHERE seated;
+
+CREATE TABLE IF NOT EXISTS transfers (
+    election_id INTEGER NOT NULL REFERENCES elections ON DELETE CASCADE,
+    round INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    dest TEXT NOT NULL,
+    votes REAL NOT NULL,
+    PRIMARY KEY (election_id, round, source, dest)
+);
+"""
+
+_DATE_RE = re.compile(r"\b(\d{1,2})/(\d{1,2})/(\d{4})\b")
+
+
+@attr.define
+class ElectionRow:
+    """Summary of one stored election, as returned by queries"""
+
+    key: str
+    jurisdiction: str
+    contest: str
+    date: Optional[str]
+    rounds: int
+
+
+class ElectionDB:
+    """Elections in an SQLite file, with a small query API
+
+    Each election is stored under a caller-chosen key (such as its report
+    path). Importing a key again replaces its rows, in one transaction, so
+    a republished report never leaves stale or duplicate data behind.
+    """
+
+    def __init__(self, db_path: Union[str, Path]):
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(_SCHEMA)
+
+    def __enter__(self) -> "ElectionDB":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    #
+    # Importing
+    #
+
+    def ingest_file(
+        self, xml_path: Union[str, Path], key: Optional[str] = None
+    ) -> bool:
+        """Imports a Dominion XML report unless already stored unchanged
+
+        :param xml_path: Report to import
+        :param key: Name to store it under (default: the path)
+        :return: True if imported, False if skipped as unchanged
+        """
+
+        key = key or str(xml_path)
+        xml_bytes = Path(xml_path).read_bytes()  # Hash what gets parsed
+        digest = hashlib.sha256(xml_bytes).hexdigest()
+        if self.digest(key) == digest:
+            return False
+        election = parse_xml.parse_file(io.BytesIO(xml_bytes))
+        self.ingest(election, key, digest=digest)
+        return True
+
+    def ingest(
+        self,
+        election: rcv_data.Election,
+        key: str,
+        jurisdiction: Optional[str] = None,
+        date: Optional[str] = None,
+        digest: Optional[str] = None,
+    ) -> None:
+        """Stores an election, replacing any earlier one with the same key
+
+        :param election: Results to store
+        :param key: Name to store it under
+        :param jurisdiction: Default: first line of title_text
+        :param date: ISO date; default: from time_text or title_text
+        :param digest: Source hash; default: hash of the election contents
+        """
+
+        title_lines = election.title_text.splitlines() or [""]
+        if digest is None:
+            contents = json.dumps(attr.asdict(election), sort_keys=True)
+            digest = hashlib.sha256(contents.encode()).hexdigest()
+
+        with self.conn:  # One transaction
+            self.conn.execute("DELETE FROM elections WHERE key = ?", (key,))
+            cursor = self.conn.execute(
+                "INSERT INTO elections (key, digest, jurisdiction, contest, "
+                "date, rounds, title_text, rcv_text, status_text, time_text, "
+                "precinct_text) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    digest,
+                    title_lines[0] if jurisdiction is None else jurisdiction,
+                    title_lines[-1],
+                    _find_date(election) if date is None else date,
+                    len(election.rounds),
+                    election.title_text,
+                    election.rcv_text,
+                    election.status_text,
+                    election.time_text,
+                    election.precinct_text,
+                ),
+            )
+            election_id = cursor.lastrowid
+            assert election_id is not None
+            self.conn.executemany(
+                "INSERT INTO rounds VALUES (?, ?, ?, ?)",
+                (
+                    (election_id, r, round.message, round.rule)
+                    for r, round in enumerate(election.rounds, 1)
+                ),
+            )
+            self.conn.executemany(
+                "INSERT INTO choices VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                _choice_rows(election_id, election),
+            )
+            self.conn.executemany(
+                "INSERT INTO transfers VALUES (?, ?, ?, ?, ?)",
+                (
+                    (election_id, r, source, dest, votes)
+                    for r, round in enumerate(election.rounds, 1)
+                    for source, choice in round.choices.items()
+                    for dest, votes in choice.elimination.items()
+                ),
+            )
+
+    def remove(self, key: str) -> bool:
+        """Deletes an election; returns False if it wasn't stored"""
+
+        with self.conn:
+            cursor = self.conn.execute(
+                "DELETE FROM elections WHERE key = ?", (key,)
+            )
+        return cursor.rowcount > 0
+
+    def digest(self, key: str) -> Optional[str]:
+        """Returns the source hash stored for a key, if any"""
+
+        row = self.conn.execute(
+            "SELECT digest FROM elections WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    #
+    # Queries
+    #
+
+    def elections(
+        self,
+        jurisdiction: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> List[ElectionRow]:
+        """Returns elections, optionally by jurisdiction and date range
+
+        :param since: ISO date, inclusive
+        :param until: ISO date, inclusive
+        """
+
+        where, params = ["1"], []
+        if jurisdiction is not None:
+            where.append("jurisdiction = ?")
+            params.append(jurisdiction)
+        if since is not None:
+            where.append("date >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("date <= ?")
+            params.append(until)
+        return self._election_rows(" AND ".join(where), params)
+
+    def with_candidate(self, name: str) -> List[ElectionRow]:
+        """Returns elections featuring a candidate (exact name)"""
+
+        return self._election_rows(
+            "id IN (SELECT election_id FROM choices WHERE name = ?)", [name]
+        )
+
+    def won_from_behind(self, first_round_standing: int = 2) -> List[str]:
+        """Returns keys of elections won by a candidate who was this far
+        back (or further) in the first round; 3 means "from third place"
+        """
+
+        rows = self.conn.execute(
+            "SELECT DISTINCT e.key FROM choices AS first "
+            "JOIN choices AS won ON won.election_id = first.election_id "
+            "AND won.name = first.name AND won.seated "
+            "JOIN elections AS e ON e.id = first.election_id "
+            "WHERE first.round = 1 AND first.standing >= ? ORDER BY e.key",
+            (first_round_standing,),
+        )
+        return [key for (key,) in rows]
+
+    def standings(self, key: str, round: int) -> List[Tuple[str, float]]:
+        """Returns (candidate, votes) in order of standing for a round"""
+
+        rows = self.conn.execute(
+            "SELECT c.name, c.incoming FROM choices AS c "
+            "JOIN elections AS e ON e.id = c.election_id "
+            "WHERE e.key = ? AND c.round = ? AND c.standing IS NOT NULL "
+            "ORDER BY c.standing, c.name",
+            (key, round),
+        )
+        return list(rows)
+
+    def load(self, key: str) -> rcv_data.Election:
+        """Rebuilds a stored rcv_data.Election"""
+
+        row = self.conn.execute(
+            "SELECT id, title_text, rcv_text, status_text, time_text, "
+            "precinct_text FROM elections WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if not row:
+            raise KeyError(key)
+
+        election_id = row[0]
+        election = rcv_data.Election(
+            title_text=row[1],
+            rcv_text=row[2],
+            status_text=row[3],
+            time_text=row[4],
+            precinct_text=row[5],
+        )
+        for message, rule in self.conn.execute(
+            "SELECT message, rule FROM rounds WHERE election_id = ? "
+            "ORDER BY round",
+            (election_id,),
+        ):
+            election.rounds.append(rcv_data.Round(message=message, rule=rule))
+        for r, name, incoming, seated, status, action in self.conn.execute(
+            "SELECT round, name, incoming, seated, status_text, action_text "
+            "FROM choices WHERE election_id = ? ORDER BY rowid",
+            (election_id,),
+        ):
+            election.rounds[r - 1].choices[name] = rcv_data.RoundChoice(
+                incoming=incoming,
+                status_text=status,
+                action_text=action,
+                seated=bool(seated),
+            )
+        for r, source, dest, votes in self.conn.execute(
+            "SELECT round, source, dest, votes FROM transfers "
+            "WHERE election_id = ? ORDER BY rowid",
+            (election_id,),
+        ):
+            election.rounds[r - 1].choices[source].elimination[dest] = votes
+        return election
+
+    def _election_rows(self, where: str, params: List) -> List[ElectionRow]:
+        rows = self.conn.execute(
+            "SELECT key, jurisdiction, contest, date, rounds FROM elections "
+            f"WHERE {where} ORDER BY date, key",
+            params,
+        )
+        return [ElectionRow(*row) for row in rows]
+
+
+def _choice_rows(
+    election_id: int, election: rcv_data.Election
+) -> Iterator[Tuple]:
+    """Yields choices table rows, with each candidate's standing by round"""
+
+    for r, round in enumerate(election.rounds, 1):
+        standing: Dict[str, int] = {}
+        ranked = sorted(
+            (-c.incoming, n)
+            for n, c in round.choices.items()
+            if n not in rcv_data.SPOILED_CHOICES
+        )
+        for i, (votes, name) in enumerate(ranked):
+            prev_votes = ranked[i - 1][0] if i else None
+            standing[name] = (
+                standing[ranked[i - 1][1]] if votes == prev_votes else i + 1
+            )
+
+        for name, choice in round.choices.items():
+            yield (
+                election_id,
+                r,
+                name,
+                choice.incoming,
+                standing.get(name),
+                choice.seated,
+                choice.status_text,
+                choice.action_text,
+            )
+
+
+def _find_date(election: rcv_data.Election) -> Optional[str]:
+    """Returns the first M/D/YYYY date in the report text, in ISO format"""
+
+    for text in (election.time_text, election.title_text):
+        match = _DATE_RE.search(text)
+        if match:
+            month, day, year = (int(g) for g in match.groups())
+            try:
+                return datetime.date(year, month, day).isoformat()
+            except ValueError:
+                continue
+    return None
+
+
+@click.command()
+@click.argument("db_path")
+@click.argument("inputs", nargs=-1, required=True)
+def main(db_path, inputs):
+    """Imports Dominion XML reports (files or directories) into a database"""
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)  # Sane ^C behavior
+
+    imported = skipped = failed = 0
+    with ElectionDB(db_path) as db:
+        for xml_path, _ in report_formats.find_reports(inputs):
+            try:
+                if db.ingest_file(xml_path):
+                    print(f"⬅️ {xml_path}")
+                    imported += 1
+                else:
+                    skipped += 1
+            except (OSError, ValueError, SyntaxError) as exc:
+                print(f"💥 {xml_path}: {exc}")
+                failed += 1
+
+    print(f"▶️ {db_path}")
+    print(f"✅ {imported} imported, {skipped} unchanged, {failed} failed")
+    if failed:
+        raise SystemExit(1)
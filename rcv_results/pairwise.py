@@ -0,0 +1,169 @@
+"""Head-to-head (Condorcet) analysis of ranked ballots"""
+
+from typing import List, Optional
+
+import attr
+import numpy as np
+
+from rcv_results import tabulate
+
+
+@attr.define
+class PairwiseTally:
+    """Counts of ballots preferring each candidate over each other one
+
+    `wins[i, j]` is the votes ranking candidate i above candidate j (a
+    ranked candidate is above all unranked ones). Marks after an overvote
+    don't count, as in tabulation. Tallies of separate chunks of ballots
+    can be merged, so a whole county never needs to be in memory at once.
+    """
+
+    candidates: List[str] = attr.Factory(list)
+    wins: np.ndarray = attr.Factory(lambda: np.zeros((0, 0)))
+
+    def __attrs_post_init__(self):
+        if self.wins.shape != (len(self.candidates),) * 2:
+            self.wins = np.zeros((len(self.candidates),) * 2)
+
+    def add(
+        self, ballots: np.ndarray, weights: Optional[np.ndarray] = None
+    ) -> None:
+        """Adds ballots (as for tabulate.tabulate_irv) to the tally"""
+
+        count = len(self.candidates)
+        if weights is None:
+            weights = np.ones(len(ballots))
+
+        # Position of each candidate on each ballot (depth if unranked)
+        depth = ballots.shape[1]
+        position = np.full((len(ballots), count), depth, np.int16)
+        over = np.zeros(len(ballots), bool)
+        rows = np.arange(len(ballots))
+        for rank in range(depth):
+            marks = np.asarray(ballots[:, rank])
+            over |= marks == tabulate.OVERVOTE
+            valid = ~over & (marks >= 0)
+            hit_rows, hit_cands = rows[valid], marks[valid]
+            first = position[hit_rows, hit_cands] == depth
+            position[hit_rows[first], hit_cands[first]] = rank
+
+        # For each rank, (candidates there)^T x (weighted later candidates)
+        for rank in range(depth):
+            here = (position == rank).astype(float)
+            later = (position > rank) * weights[:, None]
+            self.wins += here.T @ later
+
+    def merge(self, other: "PairwiseTally") -> None:
+        """Adds another tally (of the same candidates) into this one"""
+
+        if other.candidates != self.candidates:
+            raise ValueError("Merging tallies of different candidates")
+        self.wins += other.wins
+
+    def beats(self) -> np.ndarray:
+        """Returns a boolean matrix, True where i beats j head-to-head"""
+
+        return self.wins > self.wins.T
+
+    def condorcet_winner(self) -> Optional[str]:
+        """Returns the candidate who beats every other one, if any"""
+
+        beats = self.beats()
+        for i, name in enumerate(self.candidates):
+            if beats[i].sum() == len(self.candidates) - 1:
+                return name
+        return None
+
+    def smith_set(self) -> List[str]:
+        """Returns the smallest set of candidates who all beat everyone else"""
+
+        # Candidates who reach all others via "beats or ties" chains
+        reach = self.wins >= self.wins.T
+        for _ in range(max(len(reach) - 1, 0).bit_length()):
+            reach = reach | ((reach.astype(np.int64) @ reach) > 0)
+        members = np.flatnonzero(reach.all(axis=1))
+        return [self.candidates[i] for i in members.tolist()]
+
+
+def tally_chunks(
+    ballots: np.ndarray,
+    candidates: List[str],
+    chunk_size: int = 1 << 18,
+) -> PairwiseTally:
+    """Tallies a large (e.g. memory-mapped) ballot array a chunk at a time"""
+
+    tally = PairwiseTally(candidates)
+    for start in range(0, len(ballots), chunk_size):
+        tally.add(np.asarray(ballots[start : start + chunk_size]))
+    return tally
+
+
+#
+# Naive-count and brute-force Smith set cross-check to run from the command line
+#
+
+if __name__ == "__main__":
+    import argparse
+    import itertools
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--checks", type=int, default=200)
+    args = parser.parse_args()
+
+    def naive_wins(ballots, weights, count):
+        """Returns wins[i][j] as nested lists, ballot by ballot"""
+
+        wins = [[0.0] * count for _ in range(count)]
+        for row, weight in zip(ballots.tolist(), weights.tolist()):
+            ranked = []
+            for mark in row:
+                if mark == tabulate.OVERVOTE:
+                    break
+                if mark >= 0 and mark not in ranked:
+                    ranked.append(mark)
+            for i, above in enumerate(ranked):
+                for below in range(count):
+                    if below != above and below not in ranked[:i]:
+                        wins[above][below] += weight
+        return wins
+
+    def brute_smith(wins, count):
+        """Returns the smallest set that beats everyone outside it"""
+
+        for size in range(1, count + 1):
+            for members in itertools.combinations(range(count), size):
+                outside = set(range(count)) - set(members)
+                if all(
+                    wins[i][j] > wins[j][i] for i in members for j in outside
+                ):
+                    return list(members)
+        raise AssertionError("The full set always qualifies")
+
+    # Small random elections, some with ties, tallied in uneven chunks
+    rng = np.random.default_rng(args.seed)
+    for check in range(args.checks):
+        count = int(rng.integers(1, 7))
+        marks = rng.integers(
+            tabulate.OVERVOTE, count, size=(int(rng.integers(0, 40)), 4)
+        )
+        weights = rng.integers(1, 4, len(marks)).astype(float)
+        names = [f"Candidate {i}" for i in range(count)]
+
+        tally = PairwiseTally(names)
+        split = int(rng.integers(0, len(marks) + 1))
+        tally.add(marks[:split], weights[:split])
+        rest = PairwiseTally(names)
+        rest.add(marks[split:], weights[split:])
+        tally.merge(rest)
+
+        wins = naive_wins(marks, weights, count)
+        smith = [names[i] for i in brute_smith(wins, count)]
+        if tally.wins.tolist() != wins:
+            raise SystemExit(f"💥 Check {check}: wins differ from naive count")
+        if tally.smith_set() != smith:
+            raise SystemExit(f"💥 Check {check}: Smith set differs")
+        winner = tally.condorcet_winner()
+        if (winner is not None or len(smith) == 1) and [winner] != smith:
+            raise SystemExit(f"💥 Check {check}: Condorcet winner differs")
+    print(f"✅ {args.checks} random elections match the naive count")
@@ -0,0 +1,151 @@
+"""On-disk cache of parsed Dominion XML reports, keyed by file contents"""
+
+import functools
+import hashlib
+import io
+import os
+import pickle
+import tempfile
+import zlib
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+import attr
+
+from rcv_results import parse_xml, rcv_data
+
+# Bump when the entry format changes, so old entries are never read
+_ENTRY_VERSION = 3
+
+
+@attr.define
+class ParseCache:
+    """Directory of pickled Elections with size-bounded LRU eviction
+
+    A cache hit returns an rcv_data.LazyElection: metadata is read up
+    front, and rounds are decoded from the entry when first accessed.
+    Entries are written to a temporary file and renamed into place, and
+    readers treat vanished or damaged entries as misses, so any number of
+    processes can share one cache directory without locking.
+    """
+
+    cache_dir: Path = attr.field(converter=Path)
+    max_bytes: int = 1 << 30  # Evict least recently used entries past this
+
+    def parse(self, xml_path: Union[str, os.PathLike]) -> rcv_data.Election:
+        """Returns the parsed report, from the cache if possible"""
+
+        # Hash and parse the same bytes, in case the file is rewritten
+        xml_bytes = Path(xml_path).read_bytes()
+        key = self.key(xml_bytes)
+        election = self.get(key)
+        if election is None:
+            election = parse_xml.parse_file(io.BytesIO(xml_bytes))
+            self.put(key, election)
+        return election
+
+    def key(self, xml_bytes: bytes) -> str:
+        """Returns the cache key for a report's contents"""
+
+        version = f"v{parse_xml.PARSER_VERSION}.{_ENTRY_VERSION}:"
+        return hashlib.sha256(version.encode() + xml_bytes).hexdigest()
+
+    def get(self, key: str) -> Optional[rcv_data.Election]:
+        """Returns the cached Election for a key, or None if not cached"""
+
+        entry_path = self._entry_path(key)
+        try:
+            with entry_path.open("rb") as entry_file:
+                metadata, checksum, rounds_data = pickle.load(entry_file)
+            if zlib.crc32(rounds_data) != checksum:
+                return None  # Damaged; will be overwritten
+            os.utime(entry_path)  # Mark as recently used
+        except FileNotFoundError:
+            return None  # Never cached, or evicted by another process
+        except (
+            AttributeError,
+            EOFError,
+            IndexError,
+            KeyError,
+            pickle.UnpicklingError,
+            TypeError,
+            ValueError,
+        ):
+            return None  # Damaged; will be overwritten
+        load_rounds = functools.partial(_load_rounds, rounds_data)
+        return rcv_data.LazyElection(load_rounds=load_rounds, **metadata)
+
+    def put(self, key: str, election: rcv_data.Election) -> None:
+        """Stores an Election under a key, then evicts to stay under size"""
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        temp_fd, temp_name = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(temp_fd, "wb") as temp_file:
+                metadata = {
+                    f.name: getattr(election, f.name)
+                    for f in attr.fields(rcv_data.Election)
+                    if f.name != "rounds"
+                }
+                rounds_data = _dump_rounds(election.rounds)
+                entry = (metadata, zlib.crc32(rounds_data), rounds_data)
+                pickle.dump(entry, temp_file, pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_name, self._entry_path(key))
+        except BaseException:
+            Path(temp_name).unlink(missing_ok=True)
+            raise
+
+        self.evict()
+
+    def evict(self) -> None:
+        """Deletes least recently used entries until under max_bytes"""
+
+        entries: List[Tuple[float, int, Path]] = []
+        for dir_entry in os.scandir(self.cache_dir):
+            if dir_entry.name.endswith(".pickle"):
+                try:
+                    st = dir_entry.stat()
+                except FileNotFoundError:
+                    continue  # Evicted by another process
+                entries.append((st.st_mtime, st.st_size, Path(dir_entry.path)))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, entry_path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            entry_path.unlink(missing_ok=True)
+            total_bytes -= size
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.pickle"
+
+
+#
+# Rounds are pickled as plain tuples, which load several times faster than
+# pickled attrs instances (which go through __setstate__ per object), and
+# nested in the entry as bytes, so a hit needn't unpickle them until used
+#
+
+
+def _dump_rounds(rounds: List[rcv_data.Round]) -> bytes:
+    tuples = [
+        (
+            round.message,
+            round.rule,
+            [
+                (name, ch.incoming, ch.status_text, ch.action_text)
+                + (ch.elimination, ch.seated)
+                for name, ch in round.choices.items()
+            ],
+        )
+        for round in rounds
+    ]
+    return pickle.dumps(tuples, pickle.HIGHEST_PROTOCOL)
+
+
+def _load_rounds(rounds_data: bytes) -> List[rcv_data.Round]:
+    Round, RoundChoice = rcv_data.Round, rcv_data.RoundChoice
+    return [
+        Round(message, {c[0]: RoundChoice(*c[1:]) for c in choices}, rule)
+        for message, rule, choices in pickle.loads(rounds_data)
+    ]
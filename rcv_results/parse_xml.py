@@ -1,9 +1,28 @@
 """Parse Dominion XML reports"""
 
-from typing import Dict, List
+import concurrent.futures
+import io
+import math
+import mmap
+import os
+import re
+from typing import (
+    IO,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 from xml.etree import ElementTree
 
-from rcv_results import rcv_data
+import attr
+
+from rcv_results import rcv_data, xml_backends
 
 
 def _join_attrs(elems: List[ElementTree.Element], prefix="Textbox") -> str:
@@ -13,196 +32,777 @@ def _join_attrs(elems: List[ElementTree.Element], prefix="Textbox") -> str:
     )
 
 
+# Bump when parser output changes, to invalidate cached results
+PARSER_VERSION = 1
+
+# Renames from Dominion spoilage categories to our standard ones
+_CHOICE_RENAMES = {
+    "Blanks": rcv_data.BLANK_CHOICE,
+    "Exhausted": rcv_data.EXHAUSTED_CHOICE,
+    "Overvotes": rcv_data.OVERVOTE_CHOICE,
+    "Remainder Points": "",
+}
+
+# Bytes at the start of a file to read to identify its root element
+SNIFF_BYTES = 4096
+
+# Text before the root element (declaration, comments, doctype), and the
+# root start tag with its attributes
+_PROLOG_RE = re.compile(
+    r"(?:\s+|<\?.*?\?>|<!--.*?-->|<!DOCTYPE[^>\[]*(?:\[.*?\])?\s*>)*", re.S
+)
+_START_TAG_RE = re.compile(
+    r"<([\w.:-]+)((?:\s+[\w.:-]+\s*=\s*(?:\"[^\"]*\"|'[^']*'))*)\s*(/?)>"
+)
+_ATTR_RE = re.compile(r"([\w.:-]+)\s*=\s*(?:\"([^\"]*)\"|'([^']*)')")
+
+# XML declaration encoding, and those whose bytes can be split and re-parsed
+_ENCODING_RE = re.compile(
+    rb"(?:\xef\xbb\xbf)?<\?xml[^>]*?encoding\s*=\s*[\"']([\w.-]+)"
+)
+_SPLITTABLE_ENCODINGS = (b"utf-8", b"utf8", b"us-ascii", b"ascii")
+
+# <precinctGroup> start tag (or empty element), as bytes
+_PGROUP_START_RE = re.compile(
+    rb"<precinctGroup((?:\s+[\w.:-]+\s*=\s*(?:\"[^\"]*\"|'[^']*'))*)\s*(/?)>"
+)
+
+# Namespaced tags of report structure
+_REPORT_TAG = "{RcvDetailedReport}Report"
+_PGROUP_TAG = "{RcvDetailedReport}precinctGroup"
+_ROUND_TAG = "{RcvDetailedReport}roundGroup"
+
+# Namespaced tags found within <roundGroup>
+_CHOICE_TAG = "{RcvDetailedReport}choiceGroup"
+_STATUS_TAG = "{RcvDetailedReport}StatusGroup"
+_XFER_GROUP_TAG = "{RcvDetailedReport}sourceChoiceId"
+_XFER_TAG = "{RcvDetailedReport}choiceId"
+
+
+@attr.define
+class _RoundElems:
+    """Elements of interest within one <roundGroup>, bucketed by kind"""
+
+    data: List[ElementTree.Element] = attr.Factory(list)  # continuingVotes=
+    choices: List[ElementTree.Element] = attr.Factory(list)  # <choiceGroup>
+    statuses: List[ElementTree.Element] = attr.Factory(list)  # <StatusGroup>
+    xfer_groups: List[Tuple[ElementTree.Element, List[ElementTree.Element]]] = (
+        attr.Factory(list)
+    )  # (<sourceChoiceId>, [<choiceId>, ...])
+
+
+def _bucket_round(round_elem: ElementTree.Element) -> _RoundElems:
+    """Sorts the descendants of a <roundGroup> into buckets in one walk"""
+
+    elems = _RoundElems()
+    xfers: Optional[List[ElementTree.Element]] = None
+    buckets = {_CHOICE_TAG: elems.choices, _STATUS_TAG: elems.statuses}
+
+    # Preorder (document order, like ".//" paths) walk over the descendants;
+    # <choiceId> elements always nest in <sourceChoiceId>, so each one goes
+    # with the most recent <sourceChoiceId> (none before the first)
+    walk = round_elem.iter()
+    next(walk)  # Skip the <roundGroup> itself
+    for elem in walk:
+        tag = elem.tag
+        bucket = buckets.get(tag)
+        if bucket is not None:
+            bucket.append(elem)
+        elif tag == _XFER_TAG:
+            if xfers is not None:
+                xfers.append(elem)
+        elif tag == _XFER_GROUP_TAG:
+            xfers = []
+            elems.xfer_groups.append((elem, xfers))
+        elif "continuingVotes" in elem.attrib:
+            elems.data.append(elem)
+
+    return elems
+
+
 def parse_detailed_report(root: ElementTree.Element) -> rcv_data.Election:
-    """Parses an XML detailed report from Dominon for an RCV election"""
+    """Parses an XML detailed report from Dominon for an RCV election
 
-    # Expected XML namespace assignment
-    ns = {"": "RcvDetailedReport"}
+    The root may come from ElementTree or lxml (see xml_backends).
+    """
 
-    # Renames from Dominion spoilage categories to our standard ones
-    choice_renames = {
-        "Blanks": rcv_data.BLANK_CHOICE,
-        "Exhausted": rcv_data.EXHAUSTED_CHOICE,
-        "Overvotes": rcv_data.OVERVOTE_CHOICE,
-        "Remainder Points": "",
-    }
+    if isinstance(root, ElementTree.Element):
+        xml = xml_backends.STDLIB
+    else:
+        xml = xml_backends.get_backend("lxml")
 
-    election = rcv_data.Election()
+    election = _parse_metadata(root, xml)
 
     #
-    # Parse <Report> elements that give overall metadata
+    # Parse <roundGroup> elements (within <precinctGroup> for individual rounds
     #
 
-    title_elems = root.findall(".//Report[@Name='Title']", ns)
-    election.title_text = _join_attrs(title_elems)
+    pgroup_elems = xml.precinct_groups(root)
+    if len(pgroup_elems) != 1:
+        raise ValueError(f"{len(pgroup_elems)} <precinctGroup> tags")
+
+    precinct = _parse_precinct(pgroup_elems[0], xml)
+    election.precinct_text = precinct.precinct_text
+    election.rounds = precinct.rounds
+    return election
+
+
+def _parse_metadata(
+    root: ElementTree.Element,
+    xml: xml_backends.XmlBackend = xml_backends.STDLIB,
+) -> rcv_data.Election:
+    """Parses the <Report> elements that give overall metadata"""
+
+    election = rcv_data.Election()
+    election.title_text = _join_attrs(xml.title_reports(root))
+    _set_state(election, xml.state_elems(root))
+    return election
+
+
+def _set_state(
+    election: rcv_data.Election, state_elems: List[ElementTree.Element]
+) -> None:
+    """Fills in metadata from RcvStaticData elements with state="""
 
-    state_elems = root.findall(".//Report[@Name='RcvStaticData']/*[@state]", ns)
     election.status_text = "\n".join(s.get("state", "") for s in state_elems)
     election.time_text = "\n".join(s.get("timeStamp", "") for s in state_elems)
     election.rcv_text = _join_attrs(state_elems)
 
+
+@attr.define
+class _MetadataElems:
+    """Metadata sections (inner <Report>s) collected while streaming"""
+
+    titles: List[ElementTree.Element] = attr.Factory(list)  # Name="Title"
+    states: List[ElementTree.Element] = attr.Factory(list)  # state=
+
+    def end(
+        self, elem: ElementTree.Element, stack: List[ElementTree.Element]
+    ) -> None:
+        """Collects an element, if it's a finished metadata section"""
+
+        if elem.tag == _REPORT_TAG and stack:
+            if elem.get("Name") == "Title":
+                self.titles.append(elem)
+            elif elem.get("Name") == "RcvStaticData":
+                self.states.extend(e for e in elem if "state" in e.attrib)
+
+    def apply(self, election: rcv_data.Election) -> None:
+        """Fills in metadata from the sections collected"""
+
+        election.title_text = _join_attrs(self.titles)
+        _set_state(election, self.states)
+
+
+def _walk(
+    events: Iterable[Tuple[str, ElementTree.Element]],
+) -> Iterator[Tuple[str, ElementTree.Element, List[ElementTree.Element]]]:
+    """Tracks open elements through iterparse ("start", "end") events
+
+    Yields (event, element, open ancestors), checking the root tag first.
+    Callers may unlink finished elements from their parent, stack[-1].
+    """
+
+    stack: List[ElementTree.Element] = []
+    for event, elem in events:
+        if event == "start":
+            if not stack and elem.tag != _REPORT_TAG:
+                raise ValueError(f"Unrecognized XML root tag: {elem.tag}")
+            yield event, elem, stack
+            stack.append(elem)
+        else:
+            stack.pop()
+            yield event, elem, stack
+
+
+def _parse_precinct(
+    pgroup_elem: ElementTree.Element,
+    xml: xml_backends.XmlBackend = xml_backends.STDLIB,
+) -> rcv_data.Election:
+    """Parses the rounds within one <precinctGroup> (without metadata)"""
+
+    election = rcv_data.Election()
+    election.precinct_text = _join_attrs([pgroup_elem])
+    for round_elem in xml.round_groups(pgroup_elem):
+        prev = election.rounds[-1] if election.rounds else None
+        election.rounds.append(_parse_round(round_elem, prev))
+    return election
+
+
+def _parse_precinct_range(
+    path: str, start: int, end: int, root_start: bytes, root_end: bytes
+) -> rcv_data.Election:
+    """Parses one <precinctGroup> from a byte range of a file (in a worker)
+
+    The range is wrapped in the file's own prolog and root element tags, so
+    namespace declarations, entities and encoding match the whole file.
+    """
+
+    with open(path, "rb") as xml_file:
+        xml_file.seek(start)
+        pgroup_xml = xml_file.read(end - start)
+    wrapper = ElementTree.fromstring(root_start + pgroup_xml + root_end)
+    return _parse_precinct(wrapper[0])
+
+
+def _split_root_tags(head: bytes) -> Optional[Tuple[bytes, bytes]]:
+    """Finds the tags to wrap a byte range of a file in, for re-parsing
+
+    :param head: The first bytes of the file
+    :return: (Prolog through the root start tag, root end tag), or None if
+        the file can't be split (not UTF-8, or no root start tag in head)
+    """
+
+    if head.startswith((b"\xff\xfe", b"\xfe\xff")) or b"\x00" in head:
+        return None  # UTF-16 or UTF-32
+    declared = _ENCODING_RE.match(head)
+    if declared and declared.group(1).lower() not in _SPLITTABLE_ENCODINGS:
+        return None
+
+    text = head.decode("latin-1")  # Byte offsets map 1:1 to characters
+    prolog = _PROLOG_RE.match(
+        text, 3 if head.startswith(b"\xef\xbb\xbf") else 0
+    )
+    start_tag = _START_TAG_RE.match(text, prolog.end() if prolog else 0)
+    if not start_tag or start_tag.group(3):
+        return None
+    return head[: start_tag.end()], f"</{start_tag.group(1)}>".encode()
+
+
+def _precinct_ranges(data: Union[bytes, mmap.mmap]) -> List[Tuple[int, int]]:
+    """Finds the byte ranges of top-level <precinctGroup> elements"""
+
+    start_tag, end_tag = b"<precinctGroup", b"</precinctGroup>"
+    ranges: List[Tuple[int, int]] = []
+    pos = data.find(start_tag)
+    while pos >= 0:
+        tag = _PGROUP_START_RE.match(data, pos)
+        if not tag:
+            pos = data.find(start_tag, pos + len(start_tag))  # Longer name
+            continue
+
+        if tag.group(2):  # <precinctGroup/>
+            ranges.append((pos, tag.end()))
+            pos = data.find(start_tag, tag.end())
+            continue
+
+        close = data.find(end_tag, tag.end())
+        if close < 0:
+            raise ValueError("Unclosed <precinctGroup> tag")
+        ranges.append((pos, close + len(end_tag)))
+        pos = data.find(start_tag, close)
+
+    return ranges
+
+
+def _parse_round(
+    round_elem: ElementTree.Element, prev: Optional[rcv_data.Round]
+) -> rcv_data.Round:
+    """Parses and cross-checks one <roundGroup> against the previous round"""
+
+    choice_renames = _CHOICE_RENAMES
+    elems = _bucket_round(round_elem)
+    round = rcv_data.Round()
+
     #
-    # Parse <roundGroup> elements (within <precinctGroup> for individual rounds
+    # Parse <choiceGroup> elements with choice names & starting vote counts
     #
 
-    pgroup_elems = root.findall(".//precinctGroup", ns)
+    # Find the containing <Tablix> with vote totals to cross-check
+    data_elems = elems.data
+    if len(data_elems) != 1:
+        err = f"{len(data_elems)} continuingVotes= in <roundGroup>"
+        raise ValueError(err)
+
+    round.message = _join_attrs(data_elems)
+    unspoiled_total = float(data_elems[0].get("continuingVotes", 0))
+    spoiled_total = float(data_elems[0].get("nonTransferableVotes", 0))
+
+    choice_order: List[str] = []
+    unspoiled_check = spoiled_check = 0.0
+    for choice_elem in elems.choices:
+        choice = rcv_data.RoundChoice()
+        choice.incoming = float(choice_elem.get("votes", 0))
+
+        parsed_name = _join_attrs([choice_elem], prefix="choiceName")
+        if not parsed_name:
+            raise ValueError("<choiceGroup> without choiceName*=")
+
+        choice_name = choice_renames.get(parsed_name, parsed_name)
+        choice_order.append(choice_name)
+        if not choice_name:
+            if choice.incoming:
+                raise ValueError(f'{choice.incoming} votes for "{parsed_name}"')
+            continue
+
+        if choice_name in round.choices:
+            raise ValueError(f"Duplicate choiceName: {choice_name}")
+
+        if choice_name in rcv_data.SPOILED_CHOICES:
+            spoiled_check += choice.incoming
+        else:
+            unspoiled_check += choice.incoming
+
+        round.choices[choice_name] = choice
+
+    # Verify computed totals (for candidates & spoilage) against stored.
+    if (unspoiled_check, spoiled_check) != (unspoiled_total, spoiled_total):
+        raise ValueError(
+            "Vote totals mismatch: computed "
+            f"({unspoiled_check}, {spoiled_check}) != declared "
+            f"({unspoiled_total}, {spoiled_total})"
+        )
+
+    #
+    # Parse <choiceId> elements with elimination ballot transfers
+    #
+
+    # Stash the contents of <StatusGroup>, which are unfilled templates
+    # except when actually relevant (which we must determine)
+    status_elems = elems.statuses
+    if len(status_elems) != len(choice_order):
+        raise ValueError(
+            f"Mismatch: <StatusGroup> ({len(status_elems)}) != "
+            f"<choiceGroup> ({len(choice_order)})"
+        )
+
+    status_text = {
+        choice_name: _join_attrs([status_elem])
+        for choice_name, status_elem in zip(choice_order, status_elems)
+        if choice_name
+    }
+
+    xfer_names = set()
+    for xfer_group_elem, xfer_elems in elems.xfer_groups:
+        for xfer_elem in xfer_elems:
+            xfer_text = _join_attrs([xfer_elem], prefix="votes")
+            xfers = float(xfer_text) if xfer_text else None
+            source_name = xfer_elem.get("sourceChoiceName", "")
+            parsed_name = xfer_elem.get("choiceName", "")
+            name = choice_renames.get(parsed_name, parsed_name)
+            if xfers is not None:
+                if not name:
+                    raise ValueError(f'{xfers} xfers to "{parsed_name}"')
+                if not source_name:
+                    raise ValueError(f'{xfers} no-source xfers to "{name}"')
+                elim = round.choices.get(source_name)
+                if not elim:
+                    raise ValueError(f'unknown xfer source "{source_name}"')
+                elim.status_text = status_text[source_name]
+                elim.action_text = _join_attrs([xfer_group_elem])
+                elim.elimination[name] = xfers
+            if name:
+                xfer_names.add(name)
+
+    # Verify the choice names that showed up in <choiceId> vs earlier data.
+    if xfer_names != set(round.choices.keys()):
+        raise ValueError(
+            "Mismatch: <choiceGroup> ["
+            + ", ".join(sorted(round.choices.keys()))
+            + "] != <choiceId> ["
+            + ", ".join(sorted(xfer_names))
+            + "]"
+        )
+
+    # Check for magic status text strings (the only indication of victory!)
+    for name, text in status_text.items():
+        choice = round.choices[name]
+        if " is elected " in text:
+            choice.status_text = text
+            choice.seated = True
+        elif " is eliminated " in text:
+            choice.status_text = text
+
+    _check_round(round, prev)
+    return round
+
+
+def _check_round(round: rcv_data.Round, prev: Optional[rcv_data.Round]):
+    """Makes sure a round is consistent with the previous round"""
+
+    # Predict the starting values for this round from the previous one
+    predicted: Dict[str, float] = {}
+    if prev:
+        predicted = {name: ch.incoming for name, ch in prev.choices.items()}
+        for choice in prev.choices.values():
+            for name, delta in choice.elimination.items():
+                predicted[name] += delta
+
+    if prev and prev.choices.keys() != round.choices.keys():
+        raise ValueError(
+            "Choices change between rounds: ["
+            + ", ".join(prev.choices.keys())
+            + "] => ["
+            + ", ".join(round.choices.keys())
+            + "]"
+        )
+
+    # Fractional counts (like STV surplus transfers) won't add up exactly
+    for name, choice in round.choices.items():
+        expected = predicted.get(name)
+        if predicted and (
+            expected is None or not _votes_equal(expected, choice.incoming)
+        ):
+            raise ValueError(
+                f'{choice.incoming} votes for "{name}" != '
+                f"predicted {expected}"
+            )
+
+
+def _votes_equal(a: float, b: float) -> bool:
+    """Compares tallies as tabulate.votes_equal does, without NumPy"""
+
+    if a == b:
+        return True
+    if float(a).is_integer() and float(b).is_integer():
+        return False  # Whole-vote tallies compare exactly
+    return math.isclose(a, b, rel_tol=0, abs_tol=1e-6)
+
+
+def sniff_root_tag(head: bytes) -> Optional[str]:
+    """Finds the root element tag from the start of an XML document
+
+    Only the prolog and root start tag are scanned (with regexes, not an
+    XML parser), so this is cheap enough to run on every file.
+
+    :param head: The first bytes of a file (SNIFF_BYTES is usually plenty;
+        see read_head for files with a longer prolog)
+    :return: Tag like root.tag, e.g. "{RcvDetailedReport}Report", or None
+        if the head doesn't start with a complete XML start tag
+    """
+
+    text = _head_text(head)
+    prolog = _PROLOG_RE.match(text)
+    start_tag = _START_TAG_RE.match(text, prolog.end() if prolog else 0)
+    if not start_tag:
+        return None
+
+    prefix, _, local = start_tag.group(1).rpartition(":")
+    attrs = {
+        m.group(1): m.group(2) if m.group(2) is not None else m.group(3)
+        for m in _ATTR_RE.finditer(start_tag.group(2))
+    }
+    namespace = attrs.get(f"xmlns:{prefix}" if prefix else "xmlns")
+    return f"{{{namespace}}}{local}" if namespace else local
+
+
+def read_head(stream: BinaryIO) -> bytes:
+    """Reads the start of a file, through the XML root start tag if any
+
+    SNIFF_BYTES are read, then more (doubling) while the head is all prolog
+    so far, such as a long comment or DOCTYPE before the root element, so
+    sniff_root_tag can find the root tag. Other files stop at SNIFF_BYTES.
+    """
+
+    head = stream.read(SNIFF_BYTES)
+    while sniff_root_tag(head) is None:
+        text = _head_text(head)
+        prolog = _PROLOG_RE.match(text)
+        if not text[prolog.end() if prolog else 0 :].startswith("<"):
+            break  # Something other than markup; not XML
+        more = stream.read(len(head))
+        if not more:
+            break
+        head += more
+    return head
+
+
+def _head_text(head: bytes) -> str:
+    if head.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return head[: len(head) // 2 * 2].decode("utf-16", "replace")
+    # Markup is ASCII in any other encoding we'd see, so bytes map 1:1
+    return head.removeprefix(b"\xef\xbb\xbf").decode("latin-1")
+
+
+def parse(
+    text: str, lazy: bool = False, backend: Optional[str] = None
+) -> rcv_data.Election:
+    """Parses an XML detailed report from Dominon for an RCV election
+
+    With lazy=True, only metadata is read now, and rounds are parsed (and
+    checked) when first accessed; see rcv_data.LazyElection.
+
+    The backend ("stdlib", "lxml" or None for the default) picks the XML
+    library; see xml_backends. Results are the same either way.
+
+    Other documents are rejected from their root tag (see sniff_root_tag)
+    before any parsing.
+    """
+
+    head = text[:SNIFF_BYTES].encode("utf-8", "replace")
+    root_tag = sniff_root_tag(head)
+    if root_tag not in (None, _REPORT_TAG):
+        raise ValueError(f"Unrecognized XML root tag: {root_tag}")
+
+    if lazy:
+        metadata = _read_metadata(io.StringIO(text))
+        return _lazy_election(
+            metadata, lambda: parse(text, backend=backend).rounds
+        )
+
+    root = xml_backends.get_backend(backend).fromstring(text)
+    if root.tag == _REPORT_TAG:
+        return parse_detailed_report(root)  # The only format supported so far
+    else:
+        raise ValueError(f"Unrecognized XML root tag: {root.tag}")
+
+
+def parse_file(
+    source: Union[str, os.PathLike, BinaryIO],
+    lazy: bool = False,
+    backend: Optional[str] = None,
+) -> rcv_data.Election:
+    """Parses a Dominion detailed report incrementally from a path or stream
+
+    Each <roundGroup> is parsed, checked and discarded as soon as it closes,
+    so memory use is bounded by the largest round rather than the file.
+
+    With lazy=True, reading stops at the first <precinctGroup> (after the
+    metadata sections), and rounds are parsed (and checked) when first
+    accessed; see rcv_data.LazyElection. A stream must then be seekable,
+    and left open until rounds are loaded.
+
+    The backend picks the XML library, as for parse().
+    """
+
+    if lazy:
+        return _parse_file_lazy(source, backend)
+
+    election = rcv_data.Election()
+    metadata = _MetadataElems()
+    pgroup_elems: List[ElementTree.Element] = []
+
+    xml = xml_backends.get_backend(backend)
+    events = xml.iterparse(source, events=("start", "end"))
+    for event, elem, stack in _walk(events):
+        if event == "start":
+            if elem.tag == _PGROUP_TAG:
+                pgroup_elems.append(elem)
+                if len(pgroup_elems) > 1:
+                    raise ValueError("2+ <precinctGroup> tags")
+        elif (
+            elem.tag == _ROUND_TAG and pgroup_elems and pgroup_elems[0] in stack
+        ):
+            prev = election.rounds[-1] if election.rounds else None
+            election.rounds.append(_parse_round(elem, prev))
+            stack[-1].remove(elem)  # Free the subtree
+        else:
+            metadata.end(elem, stack)
+
+    metadata.apply(election)
     election.precinct_text = _join_attrs(pgroup_elems)
     if len(pgroup_elems) != 1:
         raise ValueError(f"{len(pgroup_elems)} <precinctGroup> tags")
 
-    predicted: Dict[str, float] = {}
-    for round_elem in pgroup_elems[0].findall(".//roundGroup", ns):
-        round = rcv_data.Round()
-
-        #
-        # Parse <choiceGroup> elements with choice names & starting vote counts
-        #
-
-        # Find the containing <Tablix> with vote totals to cross-check
-        data_elems = round_elem.findall(".//*[@continuingVotes]", ns)
-        if len(data_elems) != 1:
-            err = f"{len(data_elems)} continuingVotes= in <roundGroup>"
-            raise ValueError(err)
-
-        round.message = _join_attrs(data_elems)
-        unspoiled_total = float(data_elems[0].get("continuingVotes", 0))
-        spoiled_total = float(data_elems[0].get("nonTransferableVotes", 0))
-
-        choice_order: List[str] = []
-        unspoiled_check = spoiled_check = 0.0
-        for choice_elem in round_elem.findall(".//choiceGroup", ns):
-            choice = rcv_data.RoundChoice()
-            choice.incoming = float(choice_elem.get("votes", 0))
-
-            parsed_name = _join_attrs([choice_elem], prefix="choiceName")
-            if not parsed_name:
-                raise ValueError("<choiceGroup> without choiceName*=")
-
-            choice_name = choice_renames.get(parsed_name, parsed_name)
-            choice_order.append(choice_name)
-            if not choice_name:
-                if choice.incoming:
-                    raise ValueError(
-                        f'{choice.incoming} votes for "{parsed_name}"'
-                    )
-                continue
-
-            if choice_name in round.choices:
-                raise ValueError(f"Duplicate choiceName: {choice_name}")
-
-            if choice_name in rcv_data.SPOILED_CHOICES:
-                spoiled_check += choice.incoming
-            else:
-                unspoiled_check += choice.incoming
+    return election
 
-            if predicted and predicted.get(choice_name) != choice.incoming:
-                raise ValueError(
-                    f'{choice.incoming} votes for "choice_name" != '
-                    f"predicted {predicted.get(choice_name)}"
-                )
 
-            round.choices[choice_name] = choice
+def _parse_file_lazy(
+    source: Union[str, os.PathLike, BinaryIO], backend: Optional[str]
+) -> rcv_data.LazyElection:
+    """Reads only metadata now, deferring rounds to a full parse_file"""
 
-        # Verify computed totals (for candidates & spoilage) against stored.
-        if (unspoiled_check, spoiled_check) != (unspoiled_total, spoiled_total):
-            raise ValueError(
-                "Vote totals mismatch: computed "
-                f"({unspoiled_check}, {spoiled_check}) != declared "
-                f"({unspoiled_total}, {spoiled_total})"
-            )
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as xml_file:
+            metadata = _read_metadata(xml_file)
+        start = 0
+    else:
+        start = source.tell()
+        metadata = _read_metadata(source)
 
-        #
-        # Parse <choiceId> elements with elimination ballot transfers
-        #
+    def load_rounds() -> List[rcv_data.Round]:
+        if not isinstance(source, (str, os.PathLike)):
+            source.seek(start)
+        return parse_file(source, backend=backend).rounds
 
-        # Stash the contents of <StatusGroup>, which are unfilled templates
-        # except when actually relevant (which we must determine)
-        status_elems = round_elem.findall(".//StatusGroup", ns)
-        if len(status_elems) != len(choice_order):
-            raise ValueError(
-                f"Mismatch: <StatusGroup> ({len(status_elems)}) != "
-                f"<choiceGroup> ({len(choice_order)})"
-            )
+    return _lazy_election(metadata, load_rounds)
 
-        status_text = {
-            choice_name: _join_attrs([status_elem])
-            for choice_name, status_elem in zip(choice_order, status_elems)
-            if choice_name
-        }
-
-        xfer_names = set()
-        xfer_group_elems = round_elem.findall(".//sourceChoiceId", ns)
-        for xfer_group_elem in xfer_group_elems:
-            xfer_elems = xfer_group_elem.findall(".//choiceId", ns)
-            for xfer_elem in xfer_elems:
-                xfer_text = _join_attrs([xfer_elem], prefix="votes")
-                xfers = float(xfer_text) if xfer_text else None
-                source_name = xfer_elem.get("sourceChoiceName", "")
-                parsed_name = xfer_elem.get("choiceName", "")
-                name = choice_renames.get(parsed_name, parsed_name)
-                if xfers is not None:
-                    if not name:
-                        raise ValueError(f'{xfers} xfers to "{parsed_name}"')
-                    if not source_name:
-                        raise ValueError(f'{xfers} no-source xfers to "{name}"')
-                    elim = round.choices.get(source_name)
-                    if not elim:
-                        raise ValueError(f'unknown xfer source "{source_name}"')
-                    elim.status_text = status_text[source_name]
-                    elim.action_text = _join_attrs([xfer_group_elem])
-                    elim.elimination[name] = xfers
-                if name:
-                    xfer_names.add(name)
-
-        # Verify the choice names that showed up in <choiceId> vs earlier data.
-        if xfer_names != set(round.choices.keys()):
-            raise ValueError(
-                "Mismatch: <choiceGroup> ["
-                + ", ".join(sorted(round.choices.keys()))
-                + "] != <choiceId> ["
-                + ", ".join(sorted(xfer_names))
-                + "]"
-            )
 
-        # Check for magic status text strings (the only indication of victory!)
-        for name, text in status_text.items():
-            choice = round.choices[name]
-            if " is elected " in text:
-                choice.status_text = text
-                choice.seated = True
-            elif " is eliminated " in text:
-                choice.status_text = text
-
-        # Make sure rounds are consistent with each other
-        if election.rounds:
-            if election.rounds[-1].choices.keys() != round.choices.keys():
-                raise ValueError(
-                    "Choices change between rounds: ["
-                    + ", ".join(election.rounds[-1].choices.keys())
-                    + "] => ["
-                    + ", ".join(round.choices.keys())
-                    + "]"
-                )
+def _lazy_election(
+    metadata: rcv_data.Election, load_rounds: Callable[[], List[rcv_data.Round]]
+) -> rcv_data.LazyElection:
+    """Wraps metadata (from _read_metadata) with rounds loaded on access"""
 
-        election.rounds.append(round)
+    fields = attr.asdict(metadata, recurse=False)
+    del fields["rounds"]
+    return rcv_data.LazyElection(load_rounds=load_rounds, **fields)
 
-        # Predict the starting values for the next round as a cross check
-        predicted = {name: ch.incoming for name, ch in round.choices.items()}
-        for choice in round.choices.values():
-            for name, delta in choice.elimination.items():
-                predicted[name] += delta
 
+def _read_metadata(source: IO) -> rcv_data.Election:
+    """Reads report metadata, stopping at the first <precinctGroup>
+
+    Dominion reports put the Title and RcvStaticData sections before the
+    (much larger) rounds, so this reads only the start of the file.
+    """
+
+    election = rcv_data.Election()
+    metadata = _MetadataElems()
+    events = ElementTree.iterparse(source, events=("start", "end"))
+    for event, elem, stack in _walk(events):
+        if event == "start":
+            if elem.tag == _PGROUP_TAG:
+                election.precinct_text = _join_attrs([elem])
+                break
+        else:
+            metadata.end(elem, stack)
+
+    metadata.apply(election)
     return election
 
 
-def parse(text: str) -> rcv_data.Election:
-    """Parses an XML detailed report from Dominon for an RCV election"""
+def parse_precinct_file(
+    source: Union[str, os.PathLike, BinaryIO], jobs: Optional[int] = 1
+) -> Dict[str, rcv_data.Election]:
+    """Parses a precinct-level Dominion report with many <precinctGroup>s
 
-    root = ElementTree.fromstring(text)
-    if root.tag == "{RcvDetailedReport}Report":
-        return parse_detailed_report(root)  # The only format supported so far
+    With jobs=1 (or a stream), the file is read incrementally and each
+    <precinctGroup> is parsed and discarded once it closes. Otherwise the
+    file is split at <precinctGroup> boundaries and worker processes each
+    read and parse their own byte range, while this process parses the
+    remaining metadata.
+
+    :param source: Path or binary stream of the report
+    :param jobs: Worker processes (None for all CPUs, 1 to parse inline)
+    :return: An election per precinct (with report metadata), by precinct_text
+    """
+
+    if jobs != 1 and isinstance(source, (str, os.PathLike)):
+        metadata, elections = _parse_precincts_split(os.fspath(source), jobs)
     else:
+        metadata, elections = _parse_precincts_streaming(source)
+
+    if not elections:
+        raise ValueError("0 <precinctGroup> tags")
+
+    by_precinct: Dict[str, rcv_data.Election] = {}
+    for election in elections:
+        if election.precinct_text in by_precinct:
+            raise ValueError(f"Duplicate precinct: {election.precinct_text}")
+        election.title_text = metadata.title_text
+        election.status_text = metadata.status_text
+        election.time_text = metadata.time_text
+        election.rcv_text = metadata.rcv_text
+        by_precinct[election.precinct_text] = election
+
+    return by_precinct
+
+
+def _parse_precincts_streaming(
+    source: Union[str, os.PathLike, BinaryIO],
+) -> Tuple[rcv_data.Election, List[rcv_data.Election]]:
+    """Parses metadata and precincts inline, freeing each precinct's subtree"""
+
+    metadata = _MetadataElems()
+    elections: List[rcv_data.Election] = []
+    events = ElementTree.iterparse(source, events=("start", "end"))
+    for event, elem, stack in _walk(events):
+        if event == "end":
+            if elem.tag == _PGROUP_TAG:
+                elections.append(_parse_precinct(elem))
+                stack[-1].remove(elem)  # Free the subtree
+            else:
+                metadata.end(elem, stack)
+
+    election = rcv_data.Election()
+    metadata.apply(election)
+    return election, elections
+
+
+def _parse_precincts_split(
+    path: str, jobs: Optional[int]
+) -> Tuple[rcv_data.Election, List[rcv_data.Election]]:
+    """Parses precincts in worker processes, each reading its own bytes"""
+
+    with open(path, "rb") as xml_file:
+        with mmap.mmap(xml_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            root_tags = _split_root_tags(data[:SNIFF_BYTES])
+            ranges = _precinct_ranges(data) if root_tags else []
+            if not root_tags or not ranges:
+                # Byte ranges can't be found or re-parsed alone (or there
+                # are none); parse inline, one precinct at a time
+                return _parse_precincts_streaming(path)
+
+            skeleton = bytearray()
+            pos = 0
+            for start, end in ranges:
+                skeleton += data[pos:start] + b"<precinctGroup/>"
+                pos = end
+            skeleton += data[pos:]
+
+    # Metadata comes from what's left with the (bulky) precincts cut out.
+    # Each cut leaves an empty <precinctGroup/>; unless the skeleton parses
+    # with exactly those, a range wasn't an element (the byte search also
+    # finds tags in comments and CDATA), so parse inline instead
+    try:
+        root = ElementTree.fromstring(bytes(skeleton))
+    except ElementTree.ParseError:
+        return _parse_precincts_streaming(path)
+    if root.tag != _REPORT_TAG:
         raise ValueError(f"Unrecognized XML root tag: {root.tag}")
+    cuts = list(root.iter(_PGROUP_TAG))
+    if len(cuts) != len(ranges) or any(len(c) or c.attrib for c in cuts):
+        return _parse_precincts_streaming(path)
+    metadata = _parse_metadata(root)
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [
+            pool.submit(_parse_precinct_range, path, start, end, *root_tags)
+            for start, end in ranges
+        ]
+        try:
+            elections = [future.result() for future in futures]
+        except ElementTree.ParseError:
+            return _parse_precincts_streaming(path)
+
+    return metadata, elections
+
+
+def aggregate_precincts(
+    elections: Iterable[rcv_data.Election],
+) -> rcv_data.Election:
+    """Sums per-precinct results into jurisdiction-wide results
+
+    Precincts must have the same rounds and choices; the sums go through
+    the same round-to-round cross-checks as parsed reports.
+    """
+
+    total = rcv_data.Election()
+    for index, election in enumerate(elections):
+        if index == 0:
+            total = rcv_data.Election(
+                title_text=election.title_text,
+                rcv_text=election.rcv_text,
+                status_text=election.status_text,
+                time_text=election.time_text,
+            )
+            for round in election.rounds:
+                total.rounds.append(rcv_data.Round(message=round.message))
+        elif len(election.rounds) != len(total.rounds):
+            raise ValueError(
+                f"{len(election.rounds)} rounds in "
+                f'"{election.precinct_text}" != {len(total.rounds)}'
+            )
+
+        for round, total_round in zip(election.rounds, total.rounds):
+            if index and round.choices.keys() != total_round.choices.keys():
+                raise ValueError(
+                    f'Choices in "{election.precinct_text}" differ: ['
+                    + ", ".join(round.choices.keys())
+                    + "]"
+                )
+            for name, choice in round.choices.items():
+                t = total_round.choices.setdefault(name, rcv_data.RoundChoice())
+                t.incoming += choice.incoming
+                t.status_text = t.status_text or choice.status_text
+                t.action_text = t.action_text or choice.action_text
+                t.seated = t.seated or choice.seated
+                for dest, votes in choice.elimination.items():
+                    t.elimination[dest] = t.elimination.get(dest, 0) + votes
+
+    for index, round in enumerate(total.rounds):
+        _check_round(round, total.rounds[index - 1] if index else None)
+
+    return total
 
 
 #
@@ -217,7 +817,7 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--xml", required=True)
     args = parser.parse_args()
-    election = parse(open(args.xml).read())
+    election = parse_file(args.xml)
 
     prettyprinter.install_extras(["attrs"])
     prettyprinter.cpprint(election)
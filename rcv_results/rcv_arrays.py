@@ -0,0 +1,122 @@
+"""Array-backed view of RCV election results, for vectorized analysis"""
+
+import sys
+from typing import Dict, List
+
+import attr
+import numpy as np
+
+from rcv_results import rcv_data
+
+
+@attr.define
+class ElectionArrays:
+    """The rounds of an rcv_data.Election as dense NumPy arrays
+
+    Choices (candidates and spoilage categories) are indexed by position in
+    `choices`; with R rounds and C choices, the arrays are shaped:
+      incoming: R x C, votes at start of round
+      transfers: R x C (source) x C (destination), elimination vote moves
+      listed: R x C x C, True where a transfer appears (even if zero)
+      seated: R x C, True for winners
+      choice_status, choice_action: R x C, RoundChoice text (object arrays)
+
+    Every round covers the same choices, as parse_xml requires.
+    """
+
+    choices: List[str] = attr.Factory(list)  # Interned choice names
+    incoming: np.ndarray = attr.Factory(lambda: np.zeros((0, 0)))
+    transfers: np.ndarray = attr.Factory(lambda: np.zeros((0, 0, 0)))
+    listed: np.ndarray = attr.Factory(lambda: np.zeros((0, 0, 0), bool))
+    seated: np.ndarray = attr.Factory(lambda: np.zeros((0, 0), bool))
+    choice_status: np.ndarray = attr.Factory(lambda: np.zeros((0, 0), object))
+    choice_action: np.ndarray = attr.Factory(lambda: np.zeros((0, 0), object))
+    messages: List[str] = attr.Factory(list)  # Per round, like "Round 3"
+    rules: List[str] = attr.Factory(list)  # Per round, as in rcv_data.Round
+    title_text: str = ""  # Election metadata, as in rcv_data.Election
+    rcv_text: str = ""
+    status_text: str = ""
+    time_text: str = ""
+    precinct_text: str = ""
+
+    def index(self) -> Dict[str, int]:
+        """Returns a map from choice name to array index"""
+
+        return {name: i for i, name in enumerate(self.choices)}
+
+
+def from_election(election: rcv_data.Election) -> ElectionArrays:
+    """Converts an rcv_data.Election to dense arrays"""
+
+    choices: Dict[str, int] = {}
+    for round in election.rounds:
+        for name, choice in round.choices.items():
+            choices.setdefault(sys.intern(name), len(choices))
+            for dest in choice.elimination:
+                choices.setdefault(sys.intern(dest), len(choices))
+
+    shape = (len(election.rounds), len(choices))
+    arrays = ElectionArrays(
+        choices=list(choices),
+        incoming=np.zeros(shape),
+        transfers=np.zeros(shape + shape[1:]),
+        listed=np.zeros(shape + shape[1:], bool),
+        seated=np.zeros(shape, bool),
+        choice_status=np.full(shape, "", object),
+        choice_action=np.full(shape, "", object),
+        messages=[round.message for round in election.rounds],
+        rules=[round.rule for round in election.rounds],
+        title_text=election.title_text,
+        rcv_text=election.rcv_text,
+        status_text=election.status_text,
+        time_text=election.time_text,
+        precinct_text=election.precinct_text,
+    )
+
+    for r, round in enumerate(election.rounds):
+        for name, choice in round.choices.items():
+            c = choices[name]
+            arrays.incoming[r, c] = choice.incoming
+            arrays.seated[r, c] = choice.seated
+            arrays.choice_status[r, c] = choice.status_text
+            arrays.choice_action[r, c] = choice.action_text
+            for dest, votes in choice.elimination.items():
+                arrays.transfers[r, c, choices[dest]] = votes
+                arrays.listed[r, c, choices[dest]] = True
+
+    return arrays
+
+
+def to_election(arrays: ElectionArrays) -> rcv_data.Election:
+    """Converts dense arrays back to an rcv_data.Election"""
+
+    election = rcv_data.Election(
+        title_text=arrays.title_text,
+        rcv_text=arrays.rcv_text,
+        status_text=arrays.status_text,
+        time_text=arrays.time_text,
+        precinct_text=arrays.precinct_text,
+    )
+
+    incoming = arrays.incoming.tolist()  # Python values, faster to index
+    seated = arrays.seated.tolist()
+    status = arrays.choice_status.tolist()
+    action = arrays.choice_action.tolist()
+    for r, (message, rule) in enumerate(zip(arrays.messages, arrays.rules)):
+        round = rcv_data.Round(message=message, rule=rule)
+        for c, name in enumerate(arrays.choices):
+            round.choices[name] = rcv_data.RoundChoice(
+                incoming=incoming[r][c],
+                status_text=status[r][c],
+                action_text=action[r][c],
+                seated=seated[r][c],
+            )
+        election.rounds.append(round)
+
+    listed = np.nonzero(arrays.listed)
+    votes = arrays.transfers[listed].tolist()
+    for r, c, d, v in zip(*(i.tolist() for i in listed), votes):
+        source = election.rounds[r].choices[arrays.choices[c]]
+        source.elimination[arrays.choices[d]] = v
+
+    return election
@@ -1,6 +1,6 @@
 """Representation of the results of an RCV election"""
 
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional
 
 import attr
 
@@ -28,6 +28,7 @@ class Round:
 
     message: str = ""  # Like "Round 3"
     choices: Dict[str, RoundChoice] = attr.Factory(dict)  # Participants
+    rule: str = ""  # Tabulation rule applied, if recorded (see tabulate)
 
 
 @attr.define
@@ -38,3 +39,71 @@ class Election:
     status_text: str = ""  # Readable overall status
     time_text: str = ""  # Readable timestamp
     precinct_text: str = ""  # Readable geo region
+
+
+class LazyElection(Election):
+    """An Election whose rounds are loaded on first access
+
+    Metadata (title_text etc.) is filled in up front; `load_rounds` runs
+    (once) when `rounds` is first read, and any error it raises (such as
+    a failed consistency check) surfaces then. Without load_rounds, this
+    takes the same arguments as Election (so attr.evolve etc. work).
+    """
+
+    __slots__ = ("_load_rounds", "_rounds")
+
+    def __init__(
+        self,
+        *args,
+        load_rounds: Optional[Callable[[], List[Round]]] = None,
+        **fields,
+    ):
+        self._load_rounds: Optional[Callable[[], List[Round]]] = None
+        self._rounds: Optional[List[Round]] = None
+        super().__init__(*args, **fields)
+        if load_rounds is not None:
+            if args or "rounds" in fields:
+                raise TypeError("LazyElection given rounds and load_rounds")
+            self._rounds = None
+            self._load_rounds = load_rounds
+
+    @property  # type: ignore[override]
+    def rounds(self) -> List[Round]:
+        if self._rounds is None:
+            assert self._load_rounds
+            self._rounds = self._load_rounds()
+            self._load_rounds = None  # Let go of the source
+        return self._rounds
+
+    @rounds.setter
+    def rounds(self, rounds: List[Round]) -> None:
+        self._rounds = rounds
+        self._load_rounds = None
+
+    def __eq__(self, other) -> bool:
+        """Compares equal to any Election with the same contents"""
+
+        if not isinstance(other, Election):
+            return NotImplemented
+        return all(
+            getattr(self, f.name) == getattr(other, f.name)
+            for f in attr.fields(Election)
+        )
+
+    def __repr__(self) -> str:
+        """Shows metadata without loading rounds, if not loaded yet"""
+
+        if self.rounds_loaded:
+            return super().__repr__()
+        fields = ", ".join(
+            f"{f.name}={getattr(self, f.name)!r}"
+            for f in attr.fields(Election)
+            if f.name != "rounds"
+        )
+        return f"LazyElection(rounds=<not loaded>, {fields})"
+
+    @property
+    def rounds_loaded(self) -> bool:
+        """True once rounds have been loaded (or assigned)"""
+
+        return self._rounds is not None
@@ -0,0 +1,122 @@
+"""Registry of RCV report formats, identified cheaply from file contents"""
+
+import os
+from pathlib import Path
+from typing import (
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import attr
+
+from rcv_results import parse_xml, rcv_data
+
+Source = Union[str, os.PathLike, BinaryIO]
+
+
+class UnsupportedFormat(ValueError):
+    """The file is not in any registered report format"""
+
+
+@attr.frozen
+class ReportFormat:
+    """One vendor's report format: how to recognize it, and its parser"""
+
+    name: str
+    sniff: Callable[[bytes], bool]  # Is this head of a file in the format?
+    parse_file: Callable[[Source], rcv_data.Election]  # Path or stream
+
+
+# Registered formats, tried in order by sniff()
+FORMATS: Dict[str, ReportFormat] = {}
+
+
+def register_format(report_format: ReportFormat) -> None:
+    """Adds (or replaces) a format, for sniff() and parse_report()
+
+    Parsers for other vendors' exports (ES&S, Hart, ...) plug in here; a
+    sniff function should decide from the head of a file read by
+    parse_xml.read_head (SNIFF_BYTES, or through the root start tag of XML
+    with a longer prolog), without parsing it, and parse_file should
+    stream the file.
+    """
+
+    FORMATS[report_format.name] = report_format
+
+
+def sniff(head: bytes) -> Optional[ReportFormat]:
+    """Returns the registered format of a file from its first bytes, if any"""
+
+    return next((f for f in FORMATS.values() if f.sniff(head)), None)
+
+
+def sniff_file(source: Source) -> Optional[ReportFormat]:
+    """Returns the registered format of a file, reading only its start
+
+    A stream must be seekable; it's left where it started.
+    """
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as report_file:
+            return sniff(parse_xml.read_head(report_file))
+
+    start = source.tell()
+    head = parse_xml.read_head(source)
+    source.seek(start)
+    return sniff(head)
+
+
+def find_reports(
+    inputs: Iterable[Union[str, os.PathLike]],
+) -> List[Tuple[Path, Path]]:
+    """Expands command line inputs (files, or directories of *.xml files)
+
+    Directories are searched recursively, in sorted order; files are taken
+    as given, whatever their suffix.
+
+    :param inputs: Report files and/or directories
+    :return: (Report path, path relative to its input directory, or just
+        the file name for files given directly), in input order
+    """
+
+    found: List[Tuple[Path, Path]] = []
+    for input_arg in inputs:
+        input_path = Path(input_arg)
+        if input_path.is_dir():
+            found.extend(
+                (path, path.relative_to(input_path))
+                for path in sorted(input_path.rglob("*.xml"))
+            )
+        else:
+            found.append((input_path, Path(input_path.name)))
+    return found
+
+
+def parse_report(source: Source) -> rcv_data.Election:
+    """Parses a report in any registered format (from a path or stream)
+
+    :raises UnsupportedFormat: If no registered format matches the file
+    """
+
+    report_format = sniff_file(source)
+    if not report_format:
+        name = source if isinstance(source, (str, os.PathLike)) else "Stream"
+        raise UnsupportedFormat(f"{name}: Not a supported report format")
+    return report_format.parse_file(source)
+
+
+register_format(
+    ReportFormat(
+        name="dominion",
+        sniff=lambda head: (
+            parse_xml.sniff_root_tag(head) == "{RcvDetailedReport}Report"
+        ),
+        parse_file=parse_xml.parse_file,
+    )
+)
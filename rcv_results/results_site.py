@@ -0,0 +1,350 @@
+"""Static results website (HTML + JSON per contest), rebuilt incrementally"""
+
+import concurrent.futures
+import hashlib
+import html
+import json
+import os
+import signal
+import time
+import traceback
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import attr
+import click
+
+from rcv_results import parse_xml, rcv_data, report_formats
+
+# Bump when page output or _Entry fields change, to re-render every contest
+RENDER_VERSION = 1
+
+_MANIFEST_FILE = ".manifest.json"
+
+_STYLE = """
+body { font-family: sans-serif; margin: 2em; }
+table { border-collapse: collapse; }
+th, td { border: 1px solid #ccc; padding: 0.2em 0.5em; text-align: right; }
+th:first-child, td:first-child { text-align: left; }
+.seated { font-weight: bold; background: #dfd; }
+.out { color: #aaa; }
+.gain { color: #080; font-size: 80%; }
+.loss { color: #a00; font-size: 80%; }
+.bar { background: #8ac; height: 0.8em; display: inline-block; }
+.meta { color: #666; white-space: pre-line; }
+"""
+
+
+@attr.define
+class _Entry:
+    """Manifest record of one rendered contest"""
+
+    source: str  # XML file path
+    size: int  # XML file size and mtime, to skip rehashing unchanged files
+    mtime_ns: int
+    digest: str  # Hash of XML contents and renderer/parser versions
+    title_text: str = ""
+    status_text: str = ""
+    time_text: str = ""
+    winners: List[str] = attr.Factory(list)
+    error: str = ""
+
+
+def build_site(
+    xml_paths: Dict[str, Path],
+    out_dir: Path,
+    jobs: Optional[int] = None,
+    force: bool = False,
+) -> Tuple[List[str], List[str]]:
+    """Renders contests whose source (or the renderer) changed, plus an index
+
+    :param xml_paths: Dominion XML report paths, by page name (slug)
+    :param out_dir: Site directory (holds <slug>.html, <slug>.json, index)
+    :param jobs: Worker processes (default: all CPUs)
+    :param force: Re-render everything, ignoring the manifest
+    :return: (Slugs rendered, slugs removed)
+    """
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = out_dir / _MANIFEST_FILE
+    old: Dict[str, _Entry] = {}  # Reusable entries (same versions)
+    old_slugs: Set[str] = set()  # Every contest rendered last time
+    if manifest_path.exists():
+        old_json = json.loads(manifest_path.read_text())
+        old_slugs = set(old_json["contests"])
+        # Entries from other versions may not fit _Entry; don't read them
+        if not force and old_json.get("version") == _versions():
+            old = {k: _Entry(**v) for k, v in old_json["contests"].items()}
+
+    # Find contests whose dependency hash changed (hashing only files whose
+    # size or mtime changed)
+    entries: Dict[str, _Entry] = {}
+    stale: List[str] = []
+    for slug, xml_path in sorted(xml_paths.items()):
+        stat = xml_path.stat()
+        prev = old.get(slug)
+        if (
+            prev
+            and prev.source == str(xml_path)
+            and (prev.size, prev.mtime_ns) == (stat.st_size, stat.st_mtime_ns)
+        ):
+            entries[slug] = prev
+            continue
+
+        digest = _digest(xml_path)
+        if prev and prev.digest == digest:  # Just touched; keep metadata
+            entries[slug] = attr.evolve(
+                prev,
+                source=str(xml_path),
+                size=stat.st_size,
+                mtime_ns=stat.st_mtime_ns,
+            )
+        else:
+            entries[slug] = _Entry(
+                str(xml_path), stat.st_size, stat.st_mtime_ns, digest
+            )
+            stale.append(slug)
+
+    if stale:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {
+                slug: pool.submit(
+                    render_contest, xml_paths[slug], out_dir, slug
+                )
+                for slug in stale
+            }
+            for slug, future in futures.items():
+                try:
+                    metadata = future.result()
+                except Exception as exc:  # Worker died; retry next build
+                    metadata = dict(
+                        error=f"{type(exc).__name__}: {exc}",
+                        size=-1,
+                        mtime_ns=-1,
+                        digest="",
+                    )
+                entries[slug] = attr.evolve(entries[slug], **metadata)
+
+    removed = sorted(old_slugs - set(entries))
+    for slug in removed:
+        for suffix in (".html", ".json"):
+            (out_dir / f"{slug}{suffix}").unlink(missing_ok=True)
+
+    if stale or removed or not (out_dir / "index.html").exists():
+        _write(out_dir / "index.html", _render_index(entries))
+    contests = {slug: attr.asdict(e) for slug, e in entries.items()}
+    manifest = dict(version=_versions(), contests=contests)
+    _write(manifest_path, json.dumps(manifest, indent=1))
+    return stale, removed
+
+
+def render_contest(xml_path: Path, out_dir: Path, slug: str) -> Dict:
+    """Parses one report and writes its pages (runs in a worker process)
+
+    :return: Manifest metadata for the contest (error text if it failed)
+    """
+
+    try:
+        election = parse_xml.parse_file(xml_path)
+    except Exception:
+        error = traceback.format_exc()
+        _write(out_dir / f"{slug}.html", _render_error(slug, error))
+        (out_dir / f"{slug}.json").unlink(missing_ok=True)
+        return dict(error=error.splitlines()[-1])
+
+    data = json.dumps(attr.asdict(election), separators=(",", ":"))
+    _write(out_dir / f"{slug}.json", data)
+    _write(out_dir / f"{slug}.html", render_election(election, slug))
+    return dict(
+        title_text=election.title_text,
+        status_text=election.status_text,
+        time_text=election.time_text,
+        winners=(
+            [
+                name
+                for name, choice in election.rounds[-1].choices.items()
+                if choice.seated
+            ]
+            if election.rounds
+            else []
+        ),
+        error="",
+    )
+
+
+def render_election(election: rcv_data.Election, slug: str = "") -> str:
+    """Returns an HTML page with round-by-round results and transfers"""
+
+    esc = html.escape
+    title = election.title_text.replace("\n", " - ") or slug
+    out = [_page_head(title)]
+    out.append('<p><a href="index.html">All contests</a></p>')
+    out.append(f"<h1>{esc(title)}</h1>")
+    meta = "\n".join(
+        t
+        for t in (election.status_text, election.time_text, election.rcv_text)
+        if t
+    )
+    out.append(f'<p class="meta">{esc(meta)}</p>')
+    if election.precinct_text:
+        out.append(f"<p>{esc(election.precinct_text)}</p>")
+    if slug:
+        out.append(f'<p><a href="{esc(slug)}.json">JSON data</a></p>')
+
+    #
+    # Round-by-round table: votes at the start of each round, with the
+    # change the round's eliminations made
+    #
+
+    names: List[str] = []
+    for round in election.rounds:
+        names.extend(n for n in round.choices if n not in names)
+
+    out.append("<table><tr><th>Choice</th>")
+    out.extend(f"<th>{esc(round.message)}</th>" for round in election.rounds)
+    out.append("</tr>")
+    for name in names:
+        out.append(f"<tr><td>{esc(name)}</td>")
+        for round in election.rounds:
+            choice = round.choices.get(name)
+            if not choice:
+                out.append("<td></td>")
+                continue
+            delta = sum(
+                c.elimination.get(name, 0) for c in round.choices.values()
+            )
+            classes = "seated" if choice.seated else ""
+            if not choice.incoming and name not in rcv_data.SPOILED_CHOICES:
+                classes = "out"
+            cell = _votes(choice.incoming)
+            if delta:
+                kind = "gain" if delta > 0 else "loss"
+                cell += f' <span class="{kind}">{_votes(delta, "+")}</span>'
+            title_attr = esc(choice.status_text, quote=True)
+            out.append(
+                f'<td class="{classes}" title="{title_attr}">{cell}</td>'
+            )
+        out.append("</tr>")
+    out.append("</table>")
+
+    #
+    # Transfer flows: where each eliminated candidate's votes went
+    #
+
+    out.append("<h2>Transfers</h2>")
+    for round in election.rounds:
+        for name, choice in round.choices.items():
+            moves = {d: v for d, v in choice.elimination.items() if v > 0}
+            if not moves:
+                continue
+            total = sum(moves.values())
+            out.append(f"<h3>{esc(round.message)}: {esc(name)}</h3>")
+            if choice.action_text:
+                out.append(f'<p class="meta">{esc(choice.action_text)}</p>')
+            out.append("<table>")
+            for dest, votes in sorted(moves.items(), key=lambda m: -m[1]):
+                width = 300 * votes / total
+                out.append(
+                    f"<tr><td>{esc(dest)}</td><td>{_votes(votes)}</td>"
+                    f'<td style="text-align: left"><span class="bar" '
+                    f'style="width: {width:.0f}px"></span> '
+                    f"{100 * votes / total:.1f}%</td></tr>"
+                )
+            out.append("</table>")
+
+    out.append("</body></html>\n")
+    return "\n".join(out)
+
+
+def _render_index(entries: Dict[str, _Entry]) -> str:
+    esc = html.escape
+    out = [_page_head("RCV results"), "<h1>RCV results</h1>"]
+    out.append("<table><tr><th>Contest</th><th>Status</th><th>Time</th>")
+    out.append("<th>Winners</th></tr>")
+    for slug, entry in entries.items():
+        title = entry.title_text.replace("\n", " - ") or slug
+        link = f'<a href="{esc(slug)}.html">{esc(title)}</a>'
+        status = f"💥 {entry.error}" if entry.error else entry.status_text
+        out.append(
+            f"<tr><td>{link}</td><td>{esc(status)}</td>"
+            f"<td>{esc(entry.time_text)}</td>"
+            f"<td>{esc(', '.join(entry.winners))}</td></tr>"
+        )
+    out.append("</table></body></html>\n")
+    return "\n".join(out)
+
+
+def _render_error(slug: str, error: str) -> str:
+    return (
+        f"{_page_head(slug)}<h1>{html.escape(slug)}</h1>"
+        f"<pre>{html.escape(error)}</pre></body></html>\n"
+    )
+
+
+def _page_head(title: str) -> str:
+    return (
+        '<!DOCTYPE html>\n<html><head><meta charset="utf-8">'
+        f"<title>{html.escape(title)}</title><style>{_STYLE}</style>"
+        "</head><body>"
+    )
+
+
+def _votes(votes: float, sign: str = "") -> str:
+    places = 0 if votes == int(votes) else 2
+    return f"{votes:{sign},.{places}f}"
+
+
+def _versions() -> str:
+    return f"render{RENDER_VERSION}/parse{parse_xml.PARSER_VERSION}"
+
+
+def _digest(xml_path: Path) -> str:
+    """Returns the dependency hash of a contest's source file"""
+
+    digest = hashlib.sha256(f"{_versions()}:".encode())
+    with xml_path.open("rb") as xml_file:
+        while chunk := xml_file.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write(path: Path, text: str) -> None:
+    """Writes a file atomically, so readers never see it half-written"""
+
+    temp_path = path.with_name(f".{path.name}.tmp")
+    temp_path.write_text(text, encoding="utf-8")
+    os.replace(temp_path, path)
+
+
+@click.command()
+@click.argument("inputs", nargs=-1, required=True)
+@click.option("--out_dir", required=True, help="Site directory to update")
+@click.option("--jobs", type=int, help="Worker processes (default: all CPUs)")
+@click.option("--force", is_flag=True, help="Re-render every contest")
+def main(inputs, out_dir, jobs, force):
+    """Renders Dominion XML reports (files or directories) to a static site"""
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)  # Sane ^C behavior
+
+    # Page names come from paths (relative to any input directory), so
+    # they stay put as files come and go
+    xml_paths: Dict[str, Path] = {}
+    for xml_path, rel_path in report_formats.find_reports(inputs):
+        slug = "--".join(rel_path.with_suffix("").parts)
+        if slug in xml_paths:
+            print(f"💥 Same page name: {xml_paths[slug]}, {xml_path}")
+            raise SystemExit(1)
+        xml_paths[slug] = xml_path
+
+    start_time = time.monotonic()
+    rendered, removed = build_site(xml_paths, Path(out_dir), jobs, force)
+    elapsed = time.monotonic() - start_time
+    for slug in rendered:
+        print(f"🖨️ {slug}")
+    for slug in removed:
+        print(f"🗑️ {slug}")
+    print(f"▶️ {out_dir}/index.html")
+    print(
+        f"✅ {len(xml_paths)} contests, {len(rendered)} rendered, "
+        f"{len(removed)} removed in {elapsed:.1f}s"
+    )
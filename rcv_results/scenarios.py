@@ -0,0 +1,258 @@
+"""What-if IRV re-tabulation with candidates withdrawn"""
+
+import itertools
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from rcv_results import rcv_data, tabulate
+
+
+class ScenarioExplorer:
+    """Tabulates IRV with any set of candidates excluded, sharing work
+
+    The state of an IRV count depends only on which candidates are out
+    (withdrawn or eliminated), not on how they got there. States are cached
+    by that set, so scenarios that reach a set of candidates already seen
+    (most of them, since withdrawing a minor candidate rarely changes the
+    elimination order) reuse its tallies and transfers. Results match
+    tabulate.tabulate_irv, with withdrawn candidates counted as eliminated
+    before the first round (their ballots go to later rankings).
+
+    Each cached state holds a choice per distinct ballot row (one byte, or
+    two past 127 candidates), so a state costs about as much as a column of
+    the ballots array; a sweep over 1M ballots and 15 candidates can touch
+    hundreds of states. At most max_states are kept, evicting the least
+    recently used, and an evicted state is rebuilt from a cached subset (or
+    from scratch) when needed again.
+    """
+
+    def __init__(
+        self,
+        ballots: np.ndarray,
+        candidates: List[str],
+        weights: Optional[np.ndarray] = None,
+        max_states: int = 64,
+    ):
+        """Prepares for scenarios (ballots are deduplicated if unweighted)
+
+        :param ballots: Ballots array, as for tabulate.tabulate_irv
+        :param candidates: Candidate names
+        :param weights: Votes per ballot row, as for tabulate.tabulate_irv
+        :param max_states: Most count states to keep cached (LRU)
+        """
+
+        if max_states < 1:
+            raise ValueError(f"max_states={max_states} must be at least 1")
+        if weights is None:
+            ballots, weights = tabulate.unique_ballots(ballots)
+        self.ballots = ballots
+        self.weights = np.asarray(weights, float)
+        self.candidates = list(candidates)
+        self.names = self.candidates + [
+            rcv_data.BLANK_CHOICE,
+            rcv_data.EXHAUSTED_CHOICE,
+            rcv_data.OVERVOTE_CHOICE,
+        ]
+        self.blank = len(self.candidates)
+        self.exhausted = self.blank + 1
+        self.overvote = self.blank + 2
+        self.blank_rows = (ballots == tabulate.SKIPPED).all(axis=1)
+
+        # Per-ballot-row choice and tallies, by set of candidates out (least
+        # recently used first), and transfers by (set of candidates out,
+        # candidate eliminated), which are only a tally wide each
+        self.dtype = np.int8 if len(self.names) < 128 else np.int16
+        self.max_states = max_states
+        self.states: OrderedDict[
+            FrozenSet[int], Tuple[np.ndarray, np.ndarray]
+        ] = OrderedDict()
+        self.transfers: Dict[Tuple[FrozenSet[int], int], np.ndarray] = {}
+        self.hits = self.misses = 0
+
+    def tabulate(self, excluded: Iterable[str] = ()) -> rcv_data.Election:
+        """Returns IRV results as if the excluded candidates hadn't run"""
+
+        index = {name: i for i, name in enumerate(self.candidates)}
+        withdrawn = frozenset(index[name] for name in excluded)
+        out = withdrawn
+        if len(out) >= len(self.candidates):
+            raise ValueError("All candidates excluded")
+
+        election = rcv_data.Election()
+        history: List[np.ndarray] = []
+        while True:
+            tallies = self._state(out)[1]
+            history.append(tallies)
+            round = rcv_data.Round(message=f"Round {len(history)}")
+            for name, votes in zip(self.names, tallies.tolist()):
+                round.choices[name] = rcv_data.RoundChoice(incoming=votes)
+            for c in withdrawn:
+                round.choices[self.names[c]].status_text = "Withdrawn"
+            election.rounds.append(round)
+
+            active = np.array(sorted(set(range(self.blank)) - out), np.intp)
+            total = tallies[active].sum()
+            leader = int(active[np.argmax(tallies[active])])
+            if tallies[leader] * 2 > total or len(active) <= 2:
+                if len(active) == 2 and tabulate.votes_equal(*tallies[active]):
+                    loser = tabulate.last_place(active, history)
+                    leader = int(active[active != loser][0])
+                winner = round.choices[self.names[leader]]
+                winner.seated = True
+                winner.status_text = (
+                    f"{self.names[leader]} is elected in {round.message}"
+                )
+                return election
+
+            loser = tabulate.last_place(active, history)
+            name = self.names[loser]
+            round.choices[name].status_text = (
+                f"{name} is eliminated in {round.message}"
+            )
+            pairs = self._transfer(out, loser)
+            elimination = round.choices[name].elimination
+            elimination[name] = -float(pairs.sum())
+            for dest in np.flatnonzero(pairs).tolist():
+                elimination[self.names[dest]] = float(pairs[dest])
+            out = out | {loser}
+
+    def sweep(
+        self, max_excluded: int = 2
+    ) -> Dict[Tuple[str, ...], rcv_data.Election]:
+        """Tabulates every scenario with up to max_excluded withdrawals"""
+
+        results = {}
+        for size in range(max_excluded + 1):
+            for excluded in itertools.combinations(self.candidates, size):
+                if size < len(self.candidates):
+                    results[excluded] = self.tabulate(excluded)
+        return results
+
+    def _state(self, out: FrozenSet[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (choice per ballot row, tallies) with candidates out"""
+
+        state = self.states.get(out)
+        if state is not None:
+            self.hits += 1
+            self.states.move_to_end(out)
+            return state
+
+        # Reach this set from a cached subset if possible, else start fresh
+        self.misses += 1
+        for c in out:
+            if out - {c} in self.states:
+                self._step(out - {c}, c)
+                return self.states[out]
+
+        choices = self._advance(np.arange(len(self.ballots)), out)
+        choices[self.blank_rows] = self.blank
+        return self._store(out, choices)
+
+    def _transfer(self, out: FrozenSet[int], loser: int) -> np.ndarray:
+        """Returns votes moved (by destination) when a candidate goes out"""
+
+        key = (out, loser)
+        pairs = self.transfers.get(key)
+        if pairs is not None:
+            return pairs
+
+        moving, dests = self._step(out, loser)
+        width = len(self.names)
+        pairs = np.bincount(dests, self.weights[moving], minlength=width)
+        self.transfers[key] = pairs
+        return pairs
+
+    def _step(
+        self, out: FrozenSet[int], loser: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (ballot rows moved, their new choices) as loser goes out"""
+
+        # Only the ballots held by the candidate going out need to move
+        choices = self._state(out)[0]
+        moving = np.flatnonzero(choices == loser)
+        dests = self._advance(moving, out | {loser})
+        if out | {loser} not in self.states:
+            next_choices = choices.copy()
+            next_choices[moving] = dests
+            self._store(out | {loser}, next_choices)
+        return moving, dests
+
+    def _store(
+        self, out: FrozenSet[int], choices: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        width = len(self.names)
+        tallies = np.bincount(choices, self.weights, minlength=width)
+        self.states[out] = (choices, tallies)
+        while len(self.states) > self.max_states:
+            self.states.popitem(last=False)
+        return choices, tallies
+
+    def _advance(self, rows: np.ndarray, out: FrozenSet[int]) -> np.ndarray:
+        """Returns the choice for ballot rows, given candidates out"""
+
+        marks = self.ballots[rows]
+        if not marks.shape[1]:
+            return np.full(len(rows), self.exhausted, self.dtype)
+
+        inactive = np.zeros(self.blank, bool)
+        inactive[list(out)] = True
+        landed = marks >= 0
+        landed[landed] = ~inactive[marks[landed]]
+        stops = landed | (marks == tabulate.OVERVOTE)
+
+        first = np.argmax(stops, axis=1)
+        stop_marks = marks[np.arange(len(rows)), first]
+        choices = np.where(
+            stop_marks == tabulate.OVERVOTE, self.overvote, stop_marks
+        )
+        choices[~stops.any(axis=1)] = self.exhausted
+        return choices.astype(self.dtype)
+
+
+#
+# Cross-check against recounting with candidates removed, to run from the
+# command line
+#
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--checks", type=int, default=100)
+    args = parser.parse_args()
+
+    # Each scenario should match a fresh count of the ballots with the
+    # withdrawn candidates' marks removed (except for *BLANKS*, since a
+    # ballot marked only for them counts as exhausted here), including with
+    # a tiny cache that forces states to be evicted and rebuilt
+    rng = np.random.default_rng(args.seed)
+    for check in range(args.checks):
+        count = int(rng.integers(2, 7))
+        marks = rng.integers(
+            tabulate.OVERVOTE, count, size=(int(rng.integers(1, 60)), 4)
+        )
+        names = [f"Candidate {i}" for i in range(count)]
+        max_states = int(rng.integers(1, 4)) if check % 2 else 64
+        explorer = ScenarioExplorer(marks, names, max_states=max_states)
+        for excluded, election in explorer.sweep(min(count - 1, 3)).items():
+            kept = [n for n in names if n not in excluded]
+            renumber = np.full(count + 2, tabulate.SKIPPED)
+            renumber[tabulate.OVERVOTE + 2] = tabulate.OVERVOTE
+            for i, name in enumerate(kept):
+                renumber[names.index(name) + 2] = i
+            fresh = tabulate.tabulate_irv(renumber[marks + 2], kept)
+
+            tallies, seated = [], []
+            for rounds in (election.rounds, fresh.rounds):
+                tallies.append(
+                    [[r.choices[n].incoming for n in kept] for r in rounds]
+                )
+                seated.append([n for n in kept if rounds[-1].choices[n].seated])
+            if tallies[0] != tallies[1] or seated[0] != seated[1]:
+                raise SystemExit(
+                    f"💥 Check {check}: {list(excluded)} out differs from recount"
+                )
+    print(f"✅ {args.checks} random elections match recounts")
@@ -0,0 +1,204 @@
+"""Synthetic Dominion RCV detailed reports, for testing and benchmarks"""
+
+import signal
+from typing import List, Optional, TextIO, Tuple
+from xml.sax.saxutils import quoteattr
+
+import attr
+import click
+import numpy as np
+
+# Dominion spoilage category names, in report order (after candidates)
+_SPOILED_NAMES = ("Blanks", "Exhausted", "Overvotes")
+_BLANKS, _EXHAUSTED, _OVERVOTES = range(-3, 0)  # Their array indexes
+
+
+@attr.define
+class _SynthRound:
+    """One round of a synthetic count, for every precinct at once"""
+
+    incoming: np.ndarray  # Precincts x choices (candidates + spoilage)
+    transfers: np.ndarray  # Precincts x choices moved from the loser
+    loser: Optional[int] = None  # Candidate eliminated, if any
+    winner: Optional[int] = None  # Candidate elected, if any
+
+
+def write_report(
+    out: TextIO,
+    candidates: int = 8,
+    rounds: Optional[int] = None,
+    precincts: int = 1,
+    voters: int = 1000,
+    seed: int = 0,
+) -> None:
+    """Writes a random but consistent RcvDetailedReport XML document
+
+    Candidates are eliminated one per round, jurisdiction-wide, until one
+    has a majority or the round limit is reached (the leader then wins).
+    Every <precinctGroup> repeats all rounds with its own counts, so the
+    output suits parse_xml.parse_file with one precinct, and
+    parse_xml.parse_precinct_file with any number.
+
+    :param out: Text stream to write
+    :param candidates: Number of candidates (at least 2)
+    :param rounds: Maximum rounds (default, and at most, candidates - 1)
+    :param precincts: Number of <precinctGroup> sections
+    :param voters: Ballots per precinct
+    :param seed: Random seed (output is deterministic for a seed)
+    """
+
+    if candidates < 2:
+        raise ValueError(f"{candidates} candidates (need 2+)")
+
+    names = [f"Candidate {i + 1}" for i in range(candidates)]
+    count = _simulate(candidates, rounds, precincts, voters, seed)
+
+    out.write('<?xml version="1.0" encoding="utf-8"?>\n')
+    out.write('<Report xmlns="RcvDetailedReport" Name="RcvDetailedReport">\n')
+    out.write(
+        '<Title><Report Name="Title" Textbox1="Synthetic County" '
+        f'Textbox2="Synthetic Contest ({candidates} candidates)"/></Title>\n'
+    )
+    out.write(
+        '<Static><Report Name="RcvStaticData"><Tablix1 state="Unofficial" '
+        'timeStamp="1/1/2000 12:00 AM" Textbox9="Ranked Choice Voting"/>'
+        "</Report></Static>\n"
+    )
+    out.write("<Tablix><precinctGroup_Collection>\n")
+    for p in range(precincts):
+        out.write(
+            f'<precinctGroup Textbox5="Precinct {p + 1:05d}">'
+            "<roundGroup_Collection>\n"
+        )
+        for r, round in enumerate(count, 1):
+            _write_round(out, names, r, round, p)
+        out.write("</roundGroup_Collection></precinctGroup>\n")
+    out.write("</precinctGroup_Collection></Tablix></Report>\n")
+
+
+def _simulate(
+    candidates: int,
+    rounds: Optional[int],
+    precincts: int,
+    voters: int,
+    seed: int,
+) -> List[_SynthRound]:
+    """Runs an IRV-like count with random transfers in every precinct"""
+
+    rng = np.random.default_rng(seed)
+    max_rounds = candidates - 1 if rounds is None else rounds
+    max_rounds = max(1, min(max_rounds, candidates - 1))
+
+    # Candidate popularity varies a bit by precinct around a common trend
+    popularity = rng.dirichlet(np.linspace(1, 3, candidates))
+    local = rng.dirichlet(popularity * 50, size=precincts)
+    spoiled = rng.multinomial(voters // 20, [0.6, 0.4], size=precincts)
+    incoming = np.zeros((precincts, candidates + 3), np.int64)
+    incoming[:, :candidates] = rng.multinomial(voters - spoiled.sum(1), local)
+    incoming[:, _BLANKS] = spoiled[:, 0]
+    incoming[:, _OVERVOTES] = spoiled[:, 1]
+
+    count: List[_SynthRound] = []
+    alive = list(range(candidates))
+    while True:
+        totals = incoming.sum(axis=0)
+        leader = max(alive, key=lambda c: (totals[c], -c))
+        round = _SynthRound(incoming, np.zeros_like(incoming))
+        count.append(round)
+        if totals[leader] * 2 > totals[alive].sum() or len(count) >= max_rounds:
+            round.winner = leader
+            return count
+
+        # Eliminate the last-place candidate, mostly to the front-runners
+        loser = min(alive, key=lambda c: (totals[c], -c))
+        alive.remove(loser)
+        targets = alive + [_EXHAUSTED]
+        weights = np.append(popularity[alive], popularity[alive].sum() / 4)
+        moved = rng.multinomial(incoming[:, loser], weights / weights.sum())
+        round.loser = loser
+        round.transfers[:, targets] = moved
+        round.transfers[:, loser] = -incoming[:, loser]
+        incoming = incoming + round.transfers
+
+
+def _write_round(
+    out: TextIO, names: List[str], number: int, round: _SynthRound, p: int
+) -> None:
+    """Writes one <roundGroup> for one precinct"""
+
+    incoming = round.incoming[p].tolist()
+    transfers = round.transfers[p].tolist()
+    candidates = len(names)
+    continuing = sum(incoming[:candidates])
+    spoiled = sum(incoming[candidates:])
+
+    choices: List[Tuple[str, int]] = list(zip(names, incoming))
+    choices.extend(zip(_SPOILED_NAMES, incoming[candidates:]))
+
+    out.write(
+        f'<roundGroup><Tablix2 continuingVotes="{continuing}" '
+        f'nonTransferableVotes="{spoiled}" Textbox3="Round {number}">'
+        "<choiceGroup_Collection>\n"
+    )
+    for c, (name, votes) in enumerate(choices):
+        status = ""
+        if c == round.winner:
+            status = f"{name} is elected in round {number}"
+        elif c == round.loser:
+            status = f"{name} is eliminated in round {number}"
+        out.write(
+            f'<choiceGroup choiceName1={quoteattr(name)} votes="{votes}">'
+            "<StatusGroup_Collection>"
+            f"<StatusGroup Textbox7={quoteattr(status)}/>"
+            "</StatusGroup_Collection></choiceGroup>\n"
+        )
+    out.write(
+        '<choiceGroup choiceName1="Remainder Points" votes="0">'
+        '<StatusGroup_Collection><StatusGroup Textbox7=""/>'
+        "</StatusGroup_Collection></choiceGroup>\n"
+        "</choiceGroup_Collection></Tablix2>"
+        "<Tablix3><sourceChoiceId_Collection>\n"
+    )
+
+    action = ""
+    source = ""
+    if round.loser is not None:
+        source = names[round.loser]
+        action = f"Eliminated {source}"
+    out.write(
+        f"<sourceChoiceId Textbox8={quoteattr(action)}>"
+        "<choiceId_Collection>\n"
+    )
+    for c, (name, _) in enumerate(choices + [("Remainder Points", 0)]):
+        moved = transfers[c] if c < len(transfers) else 0
+        if round.loser is not None and (moved or c == round.loser):
+            out.write(
+                f"<choiceId sourceChoiceName={quoteattr(source)} "
+                f'choiceName={quoteattr(name)} votes1="{moved}"/>\n'
+            )
+        else:
+            out.write(
+                f'<choiceId sourceChoiceName="" choiceName={quoteattr(name)} '
+                'votes1=""/>\n'
+            )
+    out.write(
+        "</choiceId_Collection></sourceChoiceId></sourceChoiceId_Collection>"
+        "</Tablix3></roundGroup>\n"
+    )
+
+
+@click.command()
+@click.argument("out_path")
+@click.option("--candidates", type=int, default=8, help="Candidate count")
+@click.option("--rounds", type=int, help="Max rounds (default: all needed)")
+@click.option("--precincts", type=int, default=1, help="Precinct count")
+@click.option("--voters", type=int, default=1000, help="Ballots per precinct")
+@click.option("--seed", type=int, default=0, help="Random seed")
+def main(out_path, candidates, rounds, precincts, voters, seed):
+    """Writes a synthetic Dominion RCV detailed report XML file"""
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)  # Sane ^C behavior
+
+    with open(out_path, "w", encoding="utf-8") as out_file:
+        write_report(out_file, candidates, rounds, precincts, voters, seed)
+    print(f"▶️ {out_path}")
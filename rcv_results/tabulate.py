@@ -0,0 +1,686 @@
+"""Tabulate RCV results from ranked ballots"""
+
+import math
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from rcv_results import rcv_data
+
+# Special values in ballot arrays (other values are candidate indexes)
+SKIPPED = -1  # No mark at this rank
+OVERVOTE = -2  # More than one candidate marked at this rank
+
+# Rules recorded in Round.rule by tabulate_irv(..., batch_elimination=True)
+RULE_LAST_PLACE = "last place"  # The last-place candidate was eliminated
+RULE_BATCH = "batch elimination"  # Everyone who could not win, at once
+RULE_MAJORITY = "majority"  # The leader has a majority of active votes
+RULE_FINAL_TWO = "final two"  # Two candidates left, neither with a majority
+
+# Fractional tallies (from fractional weights or surplus transfers) within
+# this many votes of each other are equal; whole-vote tallies compare exactly
+VOTE_TOLERANCE = 1e-6
+
+
+def unique_ballots(ballots: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Collapses ballots into distinct ranking patterns with counts
+
+    Rankings are first put in a canonical form that tabulates the same:
+    marks after an overvote and repeat rankings of a candidate are dropped,
+    and skipped ranks are moved to the end. Pass the results to tabulate
+    functions as (ballots, weights) for the same outcome with less work.
+
+    :param ballots: Ballots x rank positions array, as for tabulate_irv
+    :return: (Unique patterns array, count of ballots with each pattern)
+    """
+
+    # Work column by column (on a transposed copy, for contiguous columns)
+    columns = np.array(ballots, copy=True).T
+    depth = len(columns)
+    over = np.zeros(columns.shape[1:], bool)
+    for j in range(depth):
+        mark = columns[j]
+        dropped = over.copy()
+        for earlier in columns[:j]:
+            dropped |= earlier == mark
+        mark[dropped & (mark >= 0)] = SKIPPED
+        mark[over] = SKIPPED
+        over |= mark == OVERVOTE
+
+    # Stable sort of each row on "is skipped" moves skips to the end
+    order = np.argsort(columns == SKIPPED, axis=0, kind="stable")
+    canonical = np.take_along_axis(columns, order, axis=0).T
+
+    # Pack small rows into one integer each, which sorts much faster
+    bits = max(int(canonical.max(initial=0)) + 2, 1).bit_length()
+    if depth and depth * bits <= 63:
+        keys = np.zeros(len(canonical), np.int64)
+        for column in canonical.T:
+            keys = (keys << bits) | (column.astype(np.int64) + 2)
+        keys.sort()
+        starts = np.flatnonzero(np.diff(keys, prepend=-1))
+        counts = np.diff(starts, append=len(keys))
+        packed = keys[starts]
+        patterns = np.empty((len(packed), depth), canonical.dtype)
+        for j in reversed(range(depth)):
+            patterns[:, j] = (packed & ((1 << bits) - 1)) - 2
+            packed = packed >> bits
+        return patterns, counts
+
+    patterns, counts = np.unique(canonical, axis=0, return_counts=True)
+    return patterns, counts
+
+
+def tabulate_irv(
+    ballots: np.ndarray,
+    candidates: Sequence[str],
+    weights: Optional[np.ndarray] = None,
+    batch_elimination: bool = False,
+) -> rcv_data.Election:
+    """Runs a single-winner instant runoff count
+
+    Ballots are handled like the Dominion reports read by parse_xml: ballots
+    with no marks count as *BLANKS*, ballots whose next ranking (skipping
+    unmarked ranks and eliminated candidates) is an overvote count as
+    *OVERVOTES*, and ballots that run out of rankings count as *EXHAUSTED*.
+    Eliminated candidates stay in later rounds with no votes. Ties for last
+    place go to the candidate who was behind in the latest earlier round
+    where they differed, or failing that, the one listed last.
+
+    :param ballots: Ballots x rank positions array of candidate indexes
+        (into `candidates`), SKIPPED or OVERVOTE
+    :param candidates: Candidate names
+    :param weights: Votes per ballot row (default 1), as from unique_ballots
+    :param batch_elimination: Eliminate every candidate who can't win in
+        one round (see batch_losers), which ends with the same final round
+        in fewer rounds, unless a later tie is broken differently for lack
+        of the skipped rounds; each round's `rule` then records what ended
+        it (RULE_*)
+    :return: Round-by-round results
+    """
+
+    count = _Count(ballots, candidates, weights)
+    election = rcv_data.Election()
+    while True:
+        round = count.round(len(election.rounds) + 1)
+        election.rounds.append(round)
+
+        tallies = count.tallies()
+        active = np.flatnonzero(count.active)
+        total = tallies[active].sum()
+        leader = active[np.argmax(tallies[active])]
+        if tallies[leader] * 2 > total or len(active) <= 2:
+            if len(active) == 2 and votes_equal(*tallies[active]):
+                leader = count.last_place(active)
+                leader = active[active != leader][0]
+            count.seat(round, leader)
+            if batch_elimination:
+                majority = tallies[leader] * 2 > total
+                round.rule = RULE_MAJORITY if majority else RULE_FINAL_TWO
+            return election
+
+        losers = batch_losers(tallies, active) if batch_elimination else []
+        if len(losers) > 1:
+            round.rule = RULE_BATCH
+        else:
+            losers = [count.last_place(active)]
+            round.rule = RULE_LAST_PLACE if batch_elimination else ""
+        count.eliminate(round, losers)
+
+
+def tabulate_stv(
+    ballots: np.ndarray,
+    candidates: Sequence[str],
+    seats: int,
+    surplus: str = "wigm",
+    weights: Optional[np.ndarray] = None,
+) -> rcv_data.Election:
+    """Runs a multi-winner single transferable vote count
+
+    Uses the Droop quota. Each round, candidates at or above quota are
+    elected and their surpluses transferred together at fractional value;
+    otherwise the last-place candidate is eliminated (ties as in
+    tabulate_irv). Once elected, candidates stay seated in later rounds.
+
+    :param ballots: Ballots array, as for tabulate_irv
+    :param candidates: Candidate names
+    :param seats: Number of winners
+    :param surplus: Surplus transfer method, "wigm" (weighted inclusive
+        Gregory: every ballot moves at its current weight times
+        surplus / total) or "gregory" (only the last parcel received moves,
+        at surplus / parcel value, capped at its current weight)
+    :param weights: Votes per ballot row (default 1), as for tabulate_irv
+    :return: Round-by-round results
+    """
+
+    if surplus not in ("gregory", "wigm"):
+        raise ValueError(f'Unknown surplus transfer method "{surplus}"')
+    if seats < 1:
+        raise ValueError(f"Bad seat count {seats}")
+
+    count = _Count(ballots, candidates, weights)
+    election = rcv_data.Election()
+    elected: List[int] = []
+    quota = 0.0
+    while True:
+        round = count.round(len(election.rounds) + 1)
+        election.rounds.append(round)
+        for winner in elected:
+            round.choices[count.names[winner]].seated = True
+
+        tallies = count.tallies()
+        if not quota:
+            quota = math.floor(tallies[: count.blank].sum() / (seats + 1)) + 1
+
+        active = np.flatnonzero(count.active)
+        order = active[np.argsort(-tallies[active], kind="stable")]
+        reached = tallies[order] >= quota
+        winners = order[reached | votes_equal(tallies[order], quota)]
+        open_seats = seats - len(elected)
+        if len(winners) >= open_seats or len(active) <= open_seats:
+            for winner in order[:open_seats].tolist():
+                count.seat(round, winner)
+            return election
+
+        if winners.size:
+            for winner in winners.tolist():
+                count.seat(round, winner)
+                elected.append(winner)
+            count.transfer_surplus(round, winners, quota, surplus == "gregory")
+        else:
+            count.eliminate(round, [count.last_place(active)])
+
+
+def batch_losers(tallies: np.ndarray, active: np.ndarray) -> List[int]:
+    """Finds the largest group of trailing candidates who can't win
+
+    If the trailing candidates' votes together are fewer than the next
+    candidate's, none of them can ever pass that candidate, so all of them
+    would be eliminated one by one anyway (with the same transfers, in
+    total, to everyone else) -- unless someone reached a majority partway,
+    ending the count early. Groups are only batched if even the leader,
+    gaining every vote moved before the group's last elimination, would
+    still lack a majority, so final-round tallies match one-by-one counts
+    (barring later ties, which look back at rounds that batching skips).
+
+    :param tallies: Votes by choice index in the current round
+    :param active: Indexes of candidates still in the running
+    :return: Indexes of candidates to eliminate (may be empty)
+    """
+
+    order = active[np.argsort(tallies[active], kind="stable")]
+    behind = np.cumsum(tallies[order])[:-1]  # Votes of the k lowest
+    ahead = tallies[order[1:]]
+    hopeless = np.flatnonzero((behind < ahead) & ~votes_equal(behind, ahead))
+
+    # Votes moved before each group's last elimination, at most
+    moved = np.concatenate([[0], behind])[hopeless]
+    total = tallies[active].sum()
+    hopeless = hopeless[(tallies[order[-1]] + moved) * 2 <= total]
+    if not hopeless.size:
+        return []
+    return order[: hopeless[-1] + 1].tolist()
+
+
+def last_place(active: np.ndarray, history: Sequence[np.ndarray]) -> int:
+    """Picks the candidate to eliminate, breaking ties as tabulate_irv does
+
+    :param active: Indexes of candidates still in the running
+    :param history: Tallies (by choice index) from each round so far
+    :return: Index of the candidate in last place
+    """
+
+    tied = active
+    for tallies in reversed(history):
+        tied = tied[votes_equal(tallies[tied], tallies[tied].min())]
+        if len(tied) == 1:
+            break
+    return int(tied[-1])
+
+
+def votes_equal(a, b) -> np.ndarray:
+    """Compares vote tallies, allowing for rounding in fractional counts
+
+    Whole-vote tallies (as with integer weights and no surplus transfers)
+    compare exactly; otherwise values within VOTE_TOLERANCE votes are
+    equal, with no relative tolerance, so large tallies stay distinct.
+
+    :param a: Tally or array of tallies
+    :param b: Tally or array of tallies (broadcast against a)
+    :return: Boolean array (or scalar) of equality
+    """
+
+    a, b = np.asarray(a, float), np.asarray(b, float)
+    if (a == np.round(a)).all() and (b == np.round(b)).all():
+        return a == b
+    return np.isclose(a, b, rtol=0, atol=VOTE_TOLERANCE)
+
+
+class _Count:
+    """Running state of a tabulation, with one "current choice" per ballot"""
+
+    def __init__(
+        self,
+        ballots: np.ndarray,
+        candidates: Sequence[str],
+        weights: Optional[np.ndarray],
+    ):
+        if not candidates:
+            raise ValueError("No candidates")
+        if ballots.ndim != 2:
+            raise ValueError(f"Ballots must be 2D, not shape {ballots.shape}")
+        if ballots.size and ballots.max() >= len(candidates):
+            raise ValueError(f"Ballot index {ballots.max()} >= candidates")
+        if ballots.size and ballots.min() < OVERVOTE:
+            raise ValueError(f"Bad ballot value {ballots.min()}")
+        if weights is not None and weights.shape != ballots.shape[:1]:
+            raise ValueError(f"Weights {weights.shape} != {ballots.shape}")
+
+        # Choice columns are candidates, then spoilage categories
+        self.names: List[str] = list(candidates) + [
+            rcv_data.BLANK_CHOICE,
+            rcv_data.EXHAUSTED_CHOICE,
+            rcv_data.OVERVOTE_CHOICE,
+        ]
+        self.blank = len(candidates)
+        self.exhausted = self.blank + 1
+        self.overvote = self.blank + 2
+
+        self.ballots = ballots
+        self.active = np.ones(len(candidates), bool)  # Not elim. or elected
+        self.retained = np.zeros(len(self.names))  # Kept by elected choices
+        self.history: List[np.ndarray] = []  # Tallies from each round
+
+        # Each ballot points at a rank position, and counts for a choice
+        # (with a weight, reduced by surplus transfers), which it reached
+        # in a given round (for last-parcel surplus transfers)
+        self.rank = np.zeros(len(ballots), np.intp)
+        self.choice = np.full(len(ballots), self.exhausted, np.intp)
+        self.weight = np.ones(len(ballots))
+        if weights is not None:
+            self.weight[:] = weights
+        self.arrived = np.zeros(len(ballots), np.intp)
+        self.advance(np.arange(len(ballots)))
+        self.choice[(ballots == SKIPPED).all(axis=1)] = self.blank
+
+    def tallies(self) -> np.ndarray:
+        """Returns votes for each choice (by column) at the current state"""
+
+        width = len(self.names)
+        votes = np.bincount(self.choice, self.weight, minlength=width)
+        return votes + self.retained
+
+    def round(self, number: int) -> rcv_data.Round:
+        """Records the starting tallies for a new round"""
+
+        tallies = self.tallies()
+        self.history.append(tallies)
+        round = rcv_data.Round(message=f"Round {number}")
+        for name, votes in zip(self.names, tallies.tolist()):
+            round.choices[name] = rcv_data.RoundChoice(incoming=votes)
+        return round
+
+    def last_place(self, active: np.ndarray) -> int:
+        """Picks the active candidate to eliminate"""
+
+        return last_place(active, self.history)
+
+    def seat(self, round: rcv_data.Round, winner: int) -> None:
+        """Marks a candidate as elected in this round"""
+
+        choice = round.choices[self.names[winner]]
+        choice.seated = True
+        choice.status_text = (
+            f"{self.names[winner]} is elected in {round.message}"
+        )
+        self.active[winner] = False
+
+    def eliminate(self, round: rcv_data.Round, losers: Sequence[int]) -> None:
+        """Eliminates candidates and moves their ballots to later choices"""
+
+        self.active[losers] = False
+        moving = np.flatnonzero(np.isin(self.choice, losers))
+        self.transfer(round, moving)
+        for loser in losers:
+            name = self.names[loser]
+            choice = round.choices[name]
+            choice.status_text = f"{name} is eliminated in {round.message}"
+            choice.elimination.setdefault(name, -choice.incoming)
+
+    def transfer_surplus(
+        self,
+        round: rcv_data.Round,
+        winners: np.ndarray,
+        quota: float,
+        last_parcel: bool,
+    ) -> None:
+        """Moves the surplus over quota of elected candidates onward"""
+
+        holding = np.flatnonzero(np.isin(self.choice, winners))
+        held_by = self.choice[holding]
+        width = len(self.names)
+        if last_parcel:
+            latest = np.zeros(width, np.intp)
+            np.maximum.at(latest, held_by, self.arrived[holding])
+            parcel = self.arrived[holding] == latest[held_by]
+        else:
+            parcel = np.ones(len(holding), bool)
+
+        # One transfer value per winner, applied to all moving ballots at once
+        moving = holding[parcel]
+        value = np.bincount(held_by[parcel], self.weight[moving], width)
+        surplus = np.maximum(self.tallies() - quota, 0)  # Tied at quota
+        ratio = np.ones(width)
+        np.divide(
+            surplus, value, out=ratio, where=(value > surplus) & (value > 0)
+        )
+
+        # Whatever doesn't move stays with the winner for good
+        before = np.bincount(held_by, self.weight[holding], width)
+        self.weight[holding[~parcel]] = 0.0
+        self.weight[moving] *= ratio[held_by[parcel]]
+        after = np.bincount(held_by[parcel], self.weight[moving], width)
+        self.retained += before - after
+        self.transfer(round, moving[self.weight[moving] > 0])
+
+    def transfer(self, round: rcv_data.Round, moving: np.ndarray) -> None:
+        """Advances ballots and records the moves in the source's elimination"""
+
+        sources = self.choice[moving]
+        self.advance(moving)
+        self.arrived[moving] = len(self.history)
+
+        # Tally transfers by (source, destination) choice pair
+        width = len(self.names)
+        pairs = np.bincount(
+            sources * width + self.choice[moving],
+            self.weight[moving],
+            minlength=width * width,
+        ).reshape(width, width)
+        for source in np.flatnonzero(pairs.any(axis=1)).tolist():
+            name = self.names[source]
+            elimination = round.choices[name].elimination
+            elimination[name] = -float(pairs[source].sum())
+            for dest in np.flatnonzero(pairs[source]).tolist():
+                elimination[self.names[dest]] = float(pairs[source, dest])
+
+    def advance(self, moving: np.ndarray) -> None:
+        """Moves ballots to their next active candidate, overvote or end"""
+
+        ballots, depth = self.ballots, self.ballots.shape[1]
+        while moving.size:
+            ranks = self.rank[moving]
+            ended = ranks >= depth
+            self.choice[moving[ended]] = self.exhausted
+            moving, ranks = moving[~ended], ranks[~ended]
+
+            marks = ballots[moving, ranks]
+            over = marks == OVERVOTE
+            self.choice[moving[over]] = self.overvote
+
+            landed = marks >= 0
+            landed[landed] = self.active[marks[landed]]
+            self.choice[moving[landed]] = marks[landed]
+
+            moving = moving[~(over | landed)]
+            self.rank[moving] += 1
+
+
+#
+# Benchmark and naive-count cross-check to run from the command line
+#
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from rcv_results import parse_xml
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ballots", type=int, default=2_000_000)
+    parser.add_argument("--candidates", type=int, default=12)
+    parser.add_argument("--ranks", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--checks", type=int, default=200)
+    args = parser.parse_args()
+
+    def naive_irv(ballots, weights, count):
+        """Returns (candidate tallies by round, winner), ballot by ballot"""
+
+        out, history = set(), []
+        while True:
+            tallies = [0] * count
+            for row, weight in zip(ballots.tolist(), weights.tolist()):
+                for mark in row:
+                    if mark == OVERVOTE or (mark >= 0 and mark not in out):
+                        if mark >= 0:
+                            tallies[mark] += weight
+                        break
+            history.append(tallies)
+
+            active = [c for c in range(count) if c not in out]
+            leader = max(active, key=lambda c: tallies[c])
+            tied = active
+            for earlier in reversed(history):
+                low = min(earlier[c] for c in tied)
+                tied = [c for c in tied if earlier[c] == low]
+                if len(tied) == 1:
+                    break
+            loser = tied[-1]
+            if tallies[leader] * 2 > sum(tallies[c] for c in active):
+                return history, leader
+            if len(active) <= 2:
+                if (
+                    len(active) == 2
+                    and tallies[active[0]] == tallies[active[1]]
+                ):
+                    leader = next(c for c in active if c != loser)
+                return history, leader
+            out.add(loser)
+
+    def naive_stv(ballots, weights, count, seats, last_parcel):
+        """Returns (candidate tallies by round, seated), ballot by ballot"""
+
+        rows, weight = ballots.tolist(), [float(w) for w in weights.tolist()]
+        held = [None] * len(rows)
+        arrived = [0] * len(rows)
+        out, elected, history = set(), [], []
+        retained = [0.0] * count
+
+        def move(b, number):
+            held[b], arrived[b] = None, number
+            for mark in rows[b]:
+                if mark == OVERVOTE or (mark >= 0 and mark not in out):
+                    held[b] = mark if mark >= 0 else None
+                    return
+
+        for b in range(len(rows)):
+            move(b, 0)
+        quota = None
+        while True:
+            tallies = retained[:]
+            for b, c in enumerate(held):
+                if c is not None:
+                    tallies[c] += weight[b]
+            history.append(tallies)
+            if quota is None:
+                quota = math.floor(sum(tallies) / (seats + 1)) + 1
+
+            active = [c for c in range(count) if c not in out]
+            order = sorted(active, key=lambda c: -tallies[c])
+            winners = [
+                c
+                for c in order
+                if tallies[c] >= quota or votes_equal(tallies[c], quota)
+            ]
+            open_seats = seats - len(elected)
+            if len(winners) >= open_seats or len(active) <= open_seats:
+                return history, set(elected + order[:open_seats])
+
+            if winners:
+                out.update(winners)
+                elected.extend(winners)
+                for w in winners:
+                    mine = [b for b, c in enumerate(held) if c == w]
+                    latest = max((arrived[b] for b in mine), default=0)
+                    parcel = [
+                        b
+                        for b in mine
+                        if not last_parcel or arrived[b] == latest
+                    ]
+                    value = sum(weight[b] for b in parcel)
+                    surplus = max(tallies[w] - quota, 0)
+                    ratio = surplus / value if value > surplus else 1.0
+                    for b in mine:
+                        kept = weight[b] * ratio if b in parcel else 0.0
+                        retained[w] += weight[b] - kept
+                        weight[b] = kept
+                    for b in parcel:
+                        if weight[b] > 0:
+                            move(b, len(history))
+            else:
+                tied = active
+                for earlier in reversed(history):
+                    low = min(earlier[c] for c in tied)
+                    tied = [c for c in tied if votes_equal(earlier[c], low)]
+                    if len(tied) == 1:
+                        break
+                out.add(tied[-1])
+                for b, c in enumerate(held):
+                    if c == tied[-1]:
+                        move(b, len(history))
+
+    # Cross-check against the naive count on small random elections, half
+    # of them weighted like county-scale near-ties (tallies a few votes
+    # apart out of millions), and the same for STV by both surplus methods,
+    # checking it never moves negative votes and passes the same
+    # round-to-round checks as parsed reports
+    rng = np.random.default_rng(args.seed)
+    for check in range(args.checks):
+        count = int(rng.integers(2, 7))
+        marks = rng.integers(
+            OVERVOTE, count, size=(int(rng.integers(1, 40)), 4)
+        )
+        weights = np.ones(len(marks), np.int64)
+        if check % 2:
+            weights = 1_000_000 + rng.integers(-5, 6, len(marks))
+        names = [f"Candidate {i}" for i in range(count)]
+
+        history, winner = naive_irv(marks, weights, count)
+        election = tabulate_irv(marks, names, weights)
+        tallies = [
+            [r.choices[n].incoming for n in names] for r in election.rounds
+        ]
+        final = election.rounds[-1].choices
+        seated = [n for n in names if final[n].seated]
+        if tallies != history or seated != [names[winner]]:
+            raise SystemExit(f"💥 Check {check}: IRV differs from naive count")
+        # Batch elimination should end the same, unless a tie was broken
+        # by earlier rounds (which batching skips)
+        out: set = set()
+        tied = False
+        for round in election.rounds:
+            votes = [round.choices[n].incoming for n in names if n not in out]
+            tied = tied or votes.count(min(votes)) > 1
+            out.update(
+                n
+                for n in names
+                if " eliminated " in round.choices[n].status_text
+            )
+        batch_final = tabulate_irv(
+            marks, names, weights, batch_elimination=True
+        ).rounds[-1]
+        if not tied and {
+            n: (c.incoming, c.seated) for n, c in final.items()
+        } != {
+            n: (c.incoming, c.seated) for n, c in batch_final.choices.items()
+        }:
+            raise SystemExit(f"💥 Check {check}: batch elimination differs")
+
+        seats = int(rng.integers(1, count + 1))
+        for method in ("wigm", "gregory"):
+            stv = tabulate_stv(marks, names, seats, method, weights)
+            moves = [
+                votes
+                for round in stv.rounds
+                for name, choice in round.choices.items()
+                for dest, votes in choice.elimination.items()
+                if dest != name
+            ]
+            if min(moves, default=0) < 0:
+                raise SystemExit(f"💥 Check {check}: STV moved negative votes")
+            history, seated = naive_stv(
+                marks, weights, count, seats, method == "gregory"
+            )
+            tallies = [
+                [r.choices[n].incoming for n in names] for r in stv.rounds
+            ]
+            final = stv.rounds[-1].choices
+            if (
+                len(tallies) != len(history)
+                or not all(
+                    votes_equal(t, h).all() for t, h in zip(tallies, history)
+                )
+                or {n for n in names if final[n].seated}
+                != {names[c] for c in seated}
+            ):
+                raise SystemExit(
+                    f"💥 Check {check}: STV ({method}) differs from naive count"
+                )
+            try:
+                prevs: List[Optional[rcv_data.Round]] = [None, *stv.rounds]
+                for prev, round in zip(prevs, stv.rounds):
+                    parse_xml._check_round(round, prev)
+            except ValueError as exc:
+                raise SystemExit(f"💥 Check {check}: STV rounds: {exc}")
+    print(f"✅ {args.checks} random elections match the naive count")
+
+    # Plackett-Luce rankings (via Gumbel sort) with uneven candidate
+    # popularity, mostly short ballots, and a little noise
+    rng = np.random.default_rng(args.seed)
+    shape = (args.ballots, args.candidates)
+    popularity = 0.7 ** np.arange(args.candidates)
+    prefs = np.argsort(-np.log(rng.random(shape)) / popularity, axis=1)
+    bench_ballots = prefs[:, : args.ranks].astype(np.int8)
+    lengths = rng.geometric(0.4, size=len(bench_ballots))
+    bench_ballots[np.arange(args.ranks) >= lengths[:, None]] = SKIPPED
+    noise = rng.random(bench_ballots.shape)
+    bench_ballots[noise < 0.01] = SKIPPED
+    bench_ballots[noise > 0.998] = OVERVOTE
+    names = [f"Candidate {i}" for i in range(args.candidates)]
+
+    start = time.perf_counter()
+    raw = tabulate_irv(bench_ballots, names)
+    raw_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    patterns, counts = unique_ballots(bench_ballots)
+    dedupe_time = time.perf_counter() - start
+    start = time.perf_counter()
+    deduped = tabulate_irv(patterns, names, counts)
+    weighted_time = time.perf_counter() - start
+
+    print(f"{len(bench_ballots)} ballots => {len(patterns)} patterns")
+    print(f"Raw IRV: {raw_time:.3f}s, {len(raw.rounds)} rounds")
+    print(
+        f"Deduped IRV: {dedupe_time:.3f}s dedupe + {weighted_time:.3f}s "
+        f"tabulation = {raw_time / (dedupe_time + weighted_time):.1f}x "
+        f"({raw_time / weighted_time:.0f}x excluding dedupe)"
+    )
+    print(f"Working set: {bench_ballots.nbytes} => {patterns.nbytes} bytes")
+    if deduped != raw:
+        raise SystemExit("💥 Results differ!")
+
+    start = time.perf_counter()
+    batched = tabulate_irv(patterns, names, counts, batch_elimination=True)
+    batched_time = time.perf_counter() - start
+    print(
+        f"Batch elimination IRV: {batched_time:.3f}s tabulation, "
+        f"{len(batched.rounds)} rounds"
+    )
+    final_votes = [
+        {name: c.incoming for name, c in e.rounds[-1].choices.items()}
+        for e in (raw, batched)
+    ]
+    if final_votes[0] != final_votes[1]:
+        raise SystemExit("💥 Final rounds differ!")
@@ -0,0 +1,124 @@
+"""Cumulative vote flows ("where did the votes go") across rounds"""
+
+from typing import Dict, List, Sequence
+
+import attr
+import numpy as np
+
+from rcv_results import rcv_arrays, rcv_data
+
+
+@attr.define
+class VoteFlows:
+    """Where votes held in each round end up, for many elections at once
+
+    With E elections padded to R rounds and C choices (extra rounds repeat
+    the final one and extra choices are empty), the arrays are shaped:
+      incoming: E x R x C, votes at start of round
+      steps: E x R x C (from) x C (to), fraction of votes moving in a round
+        (rows sum to 1, and the diagonal is what stays put)
+      cumulative: E x R x C x C, fraction of votes held at the start of a
+        round that end up with each choice after the final round
+
+    Reports only give totals, so votes that came to a candidate are taken
+    to move onward in the same proportions as all of that candidate's
+    votes (the flows are a Markov chain over choices).
+    """
+
+    choices: List[List[str]] = attr.Factory(list)  # Per election, by index
+    rounds: List[int] = attr.Factory(list)  # Actual rounds, per election
+    incoming: np.ndarray = attr.Factory(lambda: np.zeros((0, 0, 0)))
+    steps: np.ndarray = attr.Factory(lambda: np.zeros((0, 0, 0, 0)))
+    cumulative: np.ndarray = attr.Factory(lambda: np.zeros((0, 0, 0, 0)))
+
+    def destinations(
+        self, election: int, source: str, round: int = 0
+    ) -> Dict[str, float]:
+        """Returns where a choice's votes (from a round on) finally went
+
+        :param election: Index of the election (in the list given to flows)
+        :param source: Choice name, usually an eliminated candidate
+        :param round: Round index (0-based) whose starting votes to trace
+        :return: Votes by final choice, omitting those with none
+        """
+
+        names = self.choices[election]
+        c = names.index(source)
+        votes = float(self.incoming[election, round, c])
+        shares = self.cumulative[election, round, c, : len(names)].tolist()
+        return {
+            name: votes * share
+            for name, share in zip(names, shares)
+            if not np.isclose(votes * share, 0)
+        }
+
+
+def step_matrices(arrays: rcv_arrays.ElectionArrays) -> np.ndarray:
+    """Returns the fraction of each choice's votes moving, round by round
+
+    :param arrays: Election (see rcv_arrays.from_election)
+    :return: R x C (from) x C (to) array; rows sum to 1
+    """
+
+    incoming = arrays.incoming[:, :, None]
+    shares = np.divide(
+        arrays.transfers,
+        incoming,
+        out=np.zeros_like(arrays.transfers),
+        where=incoming > 0,
+    )
+    return shares + np.eye(len(arrays.choices))
+
+
+def cumulative_flows(steps: np.ndarray) -> np.ndarray:
+    """Composes per-round steps into flows from each round to the end
+
+    Works on any leading (batch) dimensions, one matrix product per round
+    for the whole batch.
+
+    :param steps: ... x R x C x C, as from step_matrices
+    :return: ... x R x C x C, the product of steps from each round on
+    """
+
+    cumulative = np.empty_like(steps)
+    if not steps.shape[-3]:
+        return cumulative
+    cumulative[..., -1, :, :] = steps[..., -1, :, :]
+    for r in reversed(range(steps.shape[-3] - 1)):
+        np.matmul(
+            steps[..., r, :, :],
+            cumulative[..., r + 1, :, :],
+            out=cumulative[..., r, :, :],
+        )
+    return cumulative
+
+
+def flows(elections: Sequence[rcv_data.Election]) -> VoteFlows:
+    """Builds step matrices and cumulative flows for many elections
+
+    Each election's matrices are built once from its eliminations; the
+    products are then computed for all elections together.
+    """
+
+    all_arrays = [rcv_arrays.from_election(e) for e in elections]
+    rounds = max((len(a.messages) for a in all_arrays), default=0)
+    width = max((len(a.choices) for a in all_arrays), default=0)
+
+    incoming = np.zeros((len(all_arrays), rounds, width))
+    steps = np.zeros((len(all_arrays), rounds, width, width))
+    steps[...] = np.eye(width)
+    for e, arrays in enumerate(all_arrays):
+        count, choices = arrays.incoming.shape
+        if not count:
+            continue
+        incoming[e, :count, :choices] = arrays.incoming
+        incoming[e, count:, :choices] = arrays.incoming[-1]
+        steps[e, :count, :choices, :choices] = step_matrices(arrays)
+
+    return VoteFlows(
+        choices=[a.choices for a in all_arrays],
+        rounds=[len(a.messages) for a in all_arrays],
+        incoming=incoming,
+        steps=steps,
+        cumulative=cumulative_flows(steps),
+    )
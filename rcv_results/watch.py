@@ -0,0 +1,142 @@
+"""Script to watch republished Dominion XML reports and print what changed"""
+
+import hashlib
+import io
+import json
+import signal
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from xml.etree import ElementTree
+
+import attr
+import click
+
+from rcv_results import parse_xml, rcv_data
+
+
+@attr.define
+class Change:
+    """One difference between two versions of an election's results"""
+
+    kind: str  # "round", "incoming", "seated", "elimination" or "status"
+    round: int = 0  # Round index (from 0), if relevant
+    choice: str = ""  # Choice name, if relevant
+    old: object = None  # Previous value (None for new things)
+    new: object = None  # Current value (None for removed things)
+
+
+def diff_elections(
+    old: Optional[rcv_data.Election], new: rcv_data.Election
+) -> List[Change]:
+    """Compares two versions of an election at the round and choice level
+
+    Rounds and choices that disappear are reported as well as new ones
+    (a republished count can end sooner), as are seats lost and changed
+    elimination transfers.
+
+    :param old: Previously seen version (or None if this is the first)
+    :param new: Newly parsed version
+    :return: Changes from old to new, empty if nothing relevant changed
+    """
+
+    changes: List[Change] = []
+    if old is None:
+        old = rcv_data.Election()
+
+    if old.status_text != new.status_text:
+        changes.append(
+            Change("status", old=old.status_text, new=new.status_text)
+        )
+
+    empty = rcv_data.Round()
+    for index in range(max(len(old.rounds), len(new.rounds))):
+        old_round = old.rounds[index] if index < len(old.rounds) else None
+        new_round = new.rounds[index] if index < len(new.rounds) else None
+        if old_round is None or new_round is None:
+            old_message = old_round.message if old_round else None
+            new_message = new_round.message if new_round else None
+            changes.append(Change("round", index, "", old_message, new_message))
+
+        old_choices = (old_round or empty).choices
+        new_choices = (new_round or empty).choices
+        for name in {**old_choices, **new_choices}:
+            old_choice = old_choices.get(name)
+            new_choice = new_choices.get(name)
+            old_incoming = old_choice.incoming if old_choice else None
+            new_incoming = new_choice.incoming if new_choice else None
+            if old_incoming != new_incoming:
+                changes.append(
+                    Change("incoming", index, name, old_incoming, new_incoming)
+                )
+
+            old_seated = old_choice.seated if old_choice else False
+            new_seated = new_choice.seated if new_choice else False
+            if old_seated != new_seated:
+                changes.append(
+                    Change("seated", index, name, old_seated, new_seated)
+                )
+
+            old_moves = old_choice.elimination if old_choice else {}
+            new_moves = new_choice.elimination if new_choice else {}
+            if old_moves != new_moves:
+                changes.append(
+                    Change("elimination", index, name, old_moves, new_moves)
+                )
+
+    return changes
+
+
+@click.command()
+@click.argument("watch_path")
+@click.option("--interval", default=60.0, help="Seconds between polls")
+@click.option("--once", is_flag=True, help="Poll once and exit")
+def main(watch_path, interval, once):
+    """Polls a Dominion XML report (or directory of them) for new versions
+
+    Each change is printed to stdout as a line of JSON; progress goes to
+    stderr, so stdout can be piped to a downstream consumer.
+    """
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)  # Sane ^C behavior
+
+    root_path = Path(watch_path)
+    seen: Dict[Path, Tuple[Tuple[int, int], str]] = {}  # (stat, hash)
+    elections: Dict[Path, rcv_data.Election] = {}
+    while True:
+        if root_path.is_dir():
+            xml_paths = sorted(root_path.glob("*.xml"))
+        else:
+            xml_paths = [root_path]
+
+        for xml_path in xml_paths:
+            try:
+                st = xml_path.stat()
+                stat_key = (st.st_mtime_ns, st.st_size)
+                if seen.get(xml_path, ((0, 0), ""))[0] == stat_key:
+                    continue  # Unchanged since last poll, don't even read it
+
+                xml_bytes = xml_path.read_bytes()
+                digest = hashlib.sha256(xml_bytes).hexdigest()
+                if seen.get(xml_path, ((0, 0), ""))[1] == digest:
+                    seen[xml_path] = (stat_key, digest)
+                    continue  # Rewritten with the same content
+
+                election = parse_xml.parse_file(io.BytesIO(xml_bytes))
+            except (OSError, ValueError, ElementTree.ParseError) as exc:
+                # Likely caught mid-republish; try again next poll
+                print(f"💥 {xml_path}: {exc}", file=sys.stderr)
+                continue
+
+            seen[xml_path] = (stat_key, digest)
+            changes = diff_elections(elections.get(xml_path), election)
+            elections[xml_path] = election
+            print(f"⬅️ {xml_path}: {len(changes)} changes", file=sys.stderr)
+            for change in changes:
+                out = dict(file=str(xml_path), **attr.asdict(change))
+                print(json.dumps(out), flush=True)
+
+        if once:
+            break
+        time.sleep(interval)
@@ -0,0 +1,116 @@
+"""Interchangeable XML libraries (stdlib ElementTree or lxml) for parse_xml"""
+
+import os
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from xml.etree import ElementTree
+
+import attr
+
+# Dominion detailed report XML namespace
+_NS = {"": "RcvDetailedReport"}
+_LXML_NS = {"r": "RcvDetailedReport"}
+
+
+@attr.frozen
+class XmlBackend:
+    """Parsing functions and element queries for one XML library
+
+    Elements from either library have the same interface (tag, attrib,
+    get(), items(), iter(), remove()), so parse_xml code works on both;
+    only parsing and the path queries below differ. Malformed XML raises
+    ElementTree.ParseError from either (see backend_parity).
+    """
+
+    name: str
+    fromstring: Callable[[str], Any]  # Text to root element
+    iterparse: Callable[..., Iterator[Tuple[str, Any]]]  # (source, events)
+    title_reports: Callable[[Any], List[Any]]  # <Report Name="Title">
+    state_elems: Callable[[Any], List[Any]]  # RcvStaticData children (state=)
+    precinct_groups: Callable[[Any], List[Any]]  # <precinctGroup>
+    round_groups: Callable[[Any], List[Any]]  # <roundGroup>
+
+
+STDLIB = XmlBackend(
+    name="stdlib",
+    fromstring=ElementTree.fromstring,
+    iterparse=ElementTree.iterparse,
+    title_reports=lambda e: e.findall(".//Report[@Name='Title']", _NS),
+    state_elems=lambda e: e.findall(
+        ".//Report[@Name='RcvStaticData']/*[@state]", _NS
+    ),
+    precinct_groups=lambda e: e.findall(".//precinctGroup", _NS),
+    round_groups=lambda e: e.findall(".//roundGroup", _NS),
+)
+
+
+def _lxml_backend() -> Optional[XmlBackend]:
+    """Returns the lxml backend, or None if lxml isn't installed"""
+
+    try:
+        from lxml import etree  # type: ignore
+    except ImportError:
+        return None
+
+    # Reports are data, never documents with entities to expand
+    text_parser = etree.XMLParser(resolve_entities=False, encoding="utf-8")
+
+    def parse_error(exc: Exception) -> ElementTree.ParseError:
+        error = ElementTree.ParseError(str(exc))
+        error.position = getattr(exc, "position", (0, 0))
+        return error
+
+    def fromstring(text: str) -> Any:
+        # lxml rejects str input with an encoding declaration; the text
+        # is already decoded, so parse it as UTF-8 regardless
+        try:
+            return etree.fromstring(text.encode("utf-8"), text_parser)
+        except etree.XMLSyntaxError as exc:
+            raise parse_error(exc) from exc
+
+    def iterparse(source, events) -> Iterator[Tuple[str, Any]]:
+        if isinstance(source, os.PathLike):
+            source = os.fspath(source)
+        try:
+            yield from etree.iterparse(
+                source, events=events, resolve_entities=False
+            )
+        except etree.XMLSyntaxError as exc:
+            raise parse_error(exc) from exc
+
+    def xpath(path: str) -> Callable[[Any], List[Any]]:
+        return etree.XPath(path, namespaces=_LXML_NS)
+
+    return XmlBackend(
+        name="lxml",
+        fromstring=fromstring,
+        iterparse=iterparse,
+        title_reports=xpath(".//r:Report[@Name='Title']"),
+        state_elems=xpath(".//r:Report[@Name='RcvStaticData']/*[@state]"),
+        precinct_groups=xpath(".//r:precinctGroup"),
+        round_groups=xpath(".//r:roundGroup"),
+    )
+
+
+LXML = _lxml_backend()  # None if lxml isn't installed
+
+BACKENDS: Dict[str, XmlBackend] = {
+    b.name: b for b in (STDLIB, LXML) if b is not None
+}
+
+
+def get_backend(name: Optional[str] = None) -> XmlBackend:
+    """Returns a backend by name (default stdlib)
+
+    lxml builds trees faster, but its elements are slower to walk and read
+    from Python, which is most of parse_xml's work; stdlib comes out ahead
+    on Dominion reports (see bench_parse), so it stays the default.
+
+    :param name: "stdlib", "lxml" (if installed), or None for the default
+    """
+
+    if name is None:
+        return STDLIB
+    backend = BACKENDS.get(name)
+    if not backend:
+        raise ValueError(f'XML backend "{name}" not available')
+    return backend